@@ -10,14 +10,26 @@ Usage:
     Run tests:     python3 bdd_server.py --run-tests /path/to/project
 """
 
+import bisect
+import hashlib
 import json
 import os
+import re
 import subprocess
 import sys
 import xml.etree.ElementTree as ET
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, groupby
+from operator import itemgetter
 
 from mcp.server.fastmcp import FastMCP
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used without it
+    orjson = None
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
@@ -30,55 +42,178 @@ INDEX_FILE = os.path.join(INDEX_DIR, "index.json")
 VALID_RESULTS_FORMATS = ("junit", "pytest-json", "cargo-json")
 VALID_COVERAGE_FORMATS = ("coverage-json", "lcov", "lcov-dir", "cobertura")
 
+# lcov-dir builds parse per-test files in a process pool from this many files
+# up; below it, pool startup costs more than the parsing it saves.
+LCOV_POOL_THRESHOLD = 32
+
 TYPE_PREFIX = {"goal": "g", "expectation": "e", "facet": "f"}
 
+# In-memory lookups attached to a loaded catalog; never written to disk.
+DERIVED_KEYS = ("_by_id", "_by_parent", "_by_type")
+
 # ---------------------------------------------------------------------------
-# Catalog helpers
+# JSON file I/O (orjson when installed)
 # ---------------------------------------------------------------------------
 
-def load_catalog(root):
-    path = os.path.join(root, CATALOG_FILE)
-    if not os.path.exists(path):
-        return None
+def read_json(path):
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
     with open(path) as f:
         return json.load(f)
 
 
+# path -> ((mtime_ns, size), parsed object) for files loaded or saved by
+# this process. Loaders hand back the cached object while the file is
+# untouched, so callers that mutate it must save it (which refreshes the
+# entry) or not mutate it at all.
+_FILE_CACHE = {}
+
+
+def load_json_cached(path, prepare=None):
+    """Parse path, reusing the cached object while its mtime and size hold.
+
+    ``prepare`` is applied to freshly parsed data before it is cached.
+    Returns None if the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _FILE_CACHE.pop(path, None)
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _FILE_CACHE.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    data = read_json(path)
+    if prepare is not None:
+        data = prepare(data)
+    _FILE_CACHE[path] = (stamp, data)
+    return data
+
+
+def _cache_saved(path, data):
+    """Record the in-memory object just written to path as its cached parse."""
+    st = os.stat(path)
+    _FILE_CACHE[path] = ((st.st_mtime_ns, st.st_size), data)
+
+
+# path -> (sha256, mtime_ns, size) of the last payload this process wrote
+_LAST_WRITES = {}
+
+
+def dump_json(data):
+    """Serialize data as 2-space-indented JSON bytes with a trailing newline."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2) + b"\n"
+    return (json.dumps(data, indent=2, ensure_ascii=False) + "\n").encode()
+
+
+def write_json(path, data):
+    """Atomically write data as JSON. Returns False if the file was unchanged.
+
+    The payload is written to a temporary file, fsynced and renamed over
+    path, so readers never see a half-written file. The write is skipped
+    when the payload matches what this process last wrote and the file has
+    not been touched since.
+    """
+    payload = dump_json(data)
+    digest = hashlib.sha256(payload).hexdigest()
+    last = _LAST_WRITES.get(path)
+    if last is not None and last[0] == digest:
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is not None and (st.st_mtime_ns, st.st_size) == last[1:]:
+            return False
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    st = os.stat(path)
+    _LAST_WRITES[path] = (digest, st.st_mtime_ns, st.st_size)
+    return True
+
+# ---------------------------------------------------------------------------
+# Catalog helpers
+# ---------------------------------------------------------------------------
+
+def load_catalog(root):
+    return load_json_cached(os.path.join(root, CATALOG_FILE), _prepare_catalog)
+
+
+def _prepare_catalog(catalog):
+    reindex_catalog(catalog)
+    if "_counters" in catalog:
+        # Nodes may have been added by hand or by the CLI since the
+        # counters were last written; never hand out an id that exists.
+        scanned = scan_id_counters(catalog["nodes"])
+        stored = catalog["_counters"]
+        for prefix, n in scanned.items():
+            if n > stored.get(prefix, 0):
+                stored[prefix] = n
+    return catalog
+
+
 def save_catalog(catalog, root):
     path = os.path.join(root, CATALOG_FILE)
-    with open(path, "w") as f:
-        json.dump(catalog, f, indent=2)
-        f.write("\n")
+    written = write_json(path, {k: v for k, v in catalog.items() if k not in DERIVED_KEYS})
+    _cache_saved(path, catalog)
+    return written
+
+
+def reindex_catalog(catalog):
+    """(Re)build the id, parent and type lookups cached on a catalog dict."""
+    nodes = catalog["nodes"]
+    catalog["_by_id"], catalog["_by_parent"] = _index_nodes(nodes)
+    catalog["_by_type"] = _bucket_types(nodes)
+    return catalog
 
 
 def load_config(root):
-    path = os.path.join(root, BDD_CONFIG_FILE)
-    if not os.path.exists(path):
-        return None
-    with open(path) as f:
-        return json.load(f)
+    return load_json_cached(os.path.join(root, BDD_CONFIG_FILE))
 
 
 def load_index(root):
-    path = os.path.join(root, INDEX_FILE)
-    if not os.path.exists(path):
+    index = load_json_cached(os.path.join(root, INDEX_FILE))
+    if index is None:
         return {"forward": {}, "reverse": {}, "test_results": {}, "facet_status": {}}
-    with open(path) as f:
-        return json.load(f)
+    return index
 
 
 def save_index(index, root):
     dirpath = os.path.join(root, INDEX_DIR)
     os.makedirs(dirpath, exist_ok=True)
     path = os.path.join(root, INDEX_FILE)
-    with open(path, "w") as f:
-        json.dump(index, f, indent=2)
-        f.write("\n")
+    written = write_json(path, index)
+    _cache_saved(path, index)
+    return written
 
 # ---------------------------------------------------------------------------
 # Node helpers
 # ---------------------------------------------------------------------------
 
+def _index_nodes(nodes):
+    """Walk nodes once, returning ({id: node}, {parent_id: [children]})."""
+    by_id = {}
+    by_parent = {}
+    for n in nodes:
+        by_id[n["id"]] = n
+        by_parent.setdefault(n.get("parent"), []).append(n)
+    return by_id, by_parent
+
+
+def _bucket_types(nodes):
+    """{type: [nodes]} in catalog order; every known type has a bucket."""
+    by_type = {t: [] for t in TYPE_PREFIX}
+    for n in nodes:
+        by_type.setdefault(n["type"], []).append(n)
+    return by_type
+
+
 def get_node(nodes, node_id):
     for n in nodes:
         if n["id"] == node_id:
@@ -91,40 +226,94 @@ def get_children(nodes, parent_id):
 
 
 def get_ancestor_chain(nodes, node_id):
+    """Root-first chain of nodes down to node_id; stops at a parent cycle."""
+    by_id, _ = _index_nodes(nodes)
     chain = []
-    current = get_node(nodes, node_id)
-    while current:
+    seen = set()
+    current = by_id.get(node_id)
+    while current and current["id"] not in seen:
+        seen.add(current["id"])
         chain.append(current)
         pid = current.get("parent")
-        current = get_node(nodes, pid) if pid else None
+        current = by_id.get(pid) if pid else None
     chain.reverse()
     return chain
 
 
-def compute_status(nodes, node):
-    if node["type"] == "facet":
-        return node.get("status", "untested")
-    children = get_children(nodes, node["id"])
-    if not children:
-        return "untested"
-    statuses = [compute_status(nodes, c) for c in children]
-    if all(s == "passing" for s in statuses):
-        return "passing"
-    if any(s == "failing" for s in statuses):
-        return "failing"
-    return "untested"
-
-
-def next_id(nodes, prefix):
-    max_n = 0
+def _fold_statuses(order, by_parent, statuses):
+    """Fill statuses for the non-facets in order, which lists children first.
+
+    A non-facet is passing when all children pass, failing when any child
+    fails, untested otherwise (or when it has no children).
+    """
+    for n in order:
+        if n["type"] == "facet":
+            continue
+        child_statuses = [
+            c.get("status", "untested") if c["type"] == "facet"
+            else statuses.get(c["id"], "untested")
+            for c in by_parent.get(n["id"], ())
+        ]
+        if not child_statuses:
+            statuses[n["id"]] = "untested"
+        elif all(s == "passing" for s in child_statuses):
+            statuses[n["id"]] = "passing"
+        elif "failing" in child_statuses:
+            statuses[n["id"]] = "failing"
+        else:
+            statuses[n["id"]] = "untested"
+    return statuses
+
+
+def compute_all_statuses(nodes, by_parent=None):
+    """Status of every node, folded bottom-up in a single pass.
+
+    Facets keep their own status; the rule for the rest is in
+    _fold_statuses. Nodes caught in a parent cycle are unreachable from
+    any root and are left out.
+    """
+    if by_parent is None:
+        _, by_parent = _index_nodes(nodes)
+    ids = {n["id"] for n in nodes}
+    # Breadth-first from every root (orphans included); reversed, this
+    # visits children before their parents.
+    order = [n for n in nodes if n.get("parent") not in ids]
+    i = 0
+    while i < len(order):
+        order.extend(by_parent.get(order[i]["id"], ()))
+        i += 1
+    order.reverse()
+
+    statuses = {n["id"]: n.get("status", "untested") for n in order if n["type"] == "facet"}
+    return _fold_statuses(order, by_parent, statuses)
+
+
+def scan_id_counters(nodes):
+    """Return {prefix: highest numeric suffix} over all node ids."""
+    counters = {}
     for n in nodes:
-        if n["id"].startswith(prefix + "-"):
-            try:
-                num = int(n["id"].split("-", 1)[1])
-                if num > max_n:
-                    max_n = num
-            except ValueError:
-                pass
+        prefix, _, num = n["id"].partition("-")
+        try:
+            num = int(num)
+        except ValueError:
+            continue
+        if num > counters.get(prefix, 0):
+            counters[prefix] = num
+    return counters
+
+
+def next_id(nodes, prefix, counters=None):
+    """Return the next free id for prefix.
+
+    With a counters dict (as stored in catalog["_counters"]) the id is
+    taken from it in O(1) and the counter is advanced; otherwise nodes
+    are scanned.
+    """
+    if counters is None:
+        max_n = scan_id_counters(nodes).get(prefix, 0)
+    else:
+        max_n = counters.get(prefix, 0)
+        counters[prefix] = max_n + 1
     return f"{prefix}-{max_n + 1:03d}"
 
 
@@ -141,26 +330,26 @@ def status_icon(status):
 
 def parse_junit(filepath):
     results = {}
-    tree = ET.parse(filepath)
-    root = tree.getroot()
-    suites = root.findall(".//testsuite") if root.tag == "testsuites" else [root]
-    for suite in suites:
-        for tc in suite.findall("testcase"):
-            classname = tc.get("classname", "")
-            name = tc.get("name", "")
-            test_id = f"{classname}::{name}" if classname else name
-            if tc.find("failure") is not None or tc.find("error") is not None:
-                results[test_id] = "failed"
-            elif tc.find("skipped") is not None:
-                results[test_id] = "skipped"
-            else:
-                results[test_id] = "passed"
+    # Stream testcases and drop each one once read, so large reports are
+    # never held in memory as a full tree.
+    for _, tc in ET.iterparse(filepath, events=("end",)):
+        if tc.tag != "testcase":
+            continue
+        classname = tc.get("classname", "")
+        name = tc.get("name", "")
+        test_id = f"{classname}::{name}" if classname else name
+        if tc.find("failure") is not None or tc.find("error") is not None:
+            results[test_id] = "failed"
+        elif tc.find("skipped") is not None:
+            results[test_id] = "skipped"
+        else:
+            results[test_id] = "passed"
+        tc.clear()
     return results
 
 
 def parse_pytest_json(filepath):
-    with open(filepath) as f:
-        data = json.load(f)
+    data = read_json(filepath)
     results = {}
     for test in data.get("tests", []):
         test_id = test.get("nodeid", "")
@@ -174,26 +363,30 @@ def parse_pytest_json(filepath):
     return results
 
 
-def parse_cargo_json(filepath):
-    results = {}
-    with open(filepath) as f:
+CARGO_OUTCOMES = {"ok": "passed", "failed": "failed", "ignored": "skipped"}
+
+
+def iter_json_lines(filepath):
+    """Yield each JSON object line of a JSON-lines file, skipping other output."""
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(filepath, "rb") as f:
         for line in f:
-            line = line.strip()
-            if not line:
+            if not line.startswith(b"{"):
                 continue
             try:
-                event = json.loads(line)
-            except json.JSONDecodeError:
+                yield loads(line)
+            except ValueError:
                 continue
-            if event.get("type") == "test" and event.get("event") in ("ok", "failed", "ignored"):
-                name = event.get("name", "")
-                ev = event["event"]
-                if ev == "ok":
-                    results[name] = "passed"
-                elif ev == "failed":
-                    results[name] = "failed"
-                elif ev == "ignored":
-                    results[name] = "skipped"
+
+
+def parse_cargo_json(filepath):
+    results = {}
+    for event in iter_json_lines(filepath):
+        if event.get("type") != "test":
+            continue
+        status = CARGO_OUTCOMES.get(event.get("event"))
+        if status is not None:
+            results[event.get("name", "")] = status
     return results
 
 
@@ -205,11 +398,18 @@ RESULT_PARSERS = {
 
 # ---------------------------------------------------------------------------
 # Coverage parsers
+#
+# Parsers return a flat forward map {(file, line): set(facet_ids)} with int
+# line numbers; build_index pivots it into the nested, string-keyed JSON
+# layout only once, at the end.
 # ---------------------------------------------------------------------------
 
-def match_context_to_facets(context_name, test_to_facets):
+def match_context_to_facets(context_name, test_to_facets, lookups=None):
     """Match a coverage context name to facet IDs using precise matching.
-    Tries exact, then normalized, then strips coverage.py context suffixes."""
+    Tries exact, then normalized, then strips coverage.py context suffixes.
+
+    ``lookups`` is build_test_id_lookups(test_to_facets), precomputed by
+    callers that match many contexts against the same map."""
     # coverage.py contexts look like "tests/test_calc.py::test_add|run"
     # Strip the |run suffix if present
     clean = context_name.split("|")[0].strip()
@@ -218,95 +418,88 @@ def match_context_to_facets(context_name, test_to_facets):
     if clean in test_to_facets:
         return test_to_facets[clean]
 
-    # Normalized match
-    norm_ctx = normalize_test_id(clean)
-    for test_id, facet_ids in test_to_facets.items():
-        if normalize_test_id(test_id) == norm_ctx:
-            return facet_ids
-
-    # Suffix match (function name after ::)
-    if "::" in clean:
-        ctx_suffix = clean.rsplit("::", 1)[-1].lower()
-        for test_id, facet_ids in test_to_facets.items():
-            if "::" in test_id:
-                tid_suffix = test_id.rsplit("::", 1)[-1].lower()
-                if tid_suffix == ctx_suffix:
-                    return facet_ids
-
-    return []
+    test_id = lookup_test_id(clean, lookups or build_test_id_lookups(test_to_facets))
+    return test_to_facets[test_id] if test_id is not None else []
 
 
 def parse_coverage_json(filepath, root, test_to_facets):
     """Parse coverage.py JSON with per-test contexts. Returns forward map."""
-    with open(filepath) as f:
-        data = json.load(f)
-    forward = {}  # file -> line -> set(facet_ids)
+    data = read_json(filepath)
+    lookups = build_test_id_lookups(test_to_facets)
+    forward = defaultdict(set)  # (file, line) -> set(facet_ids)
     for src_file, file_data in data.get("files", {}).items():
         contexts = file_data.get("contexts", {})
         if isinstance(contexts, dict):
             for context_name, lines in contexts.items():
-                matched_facets = match_context_to_facets(context_name, test_to_facets)
+                matched_facets = match_context_to_facets(context_name, test_to_facets, lookups)
                 if matched_facets:
                     rel = os.path.relpath(src_file, root) if os.path.isabs(src_file) else src_file
-                    if rel not in forward:
-                        forward[rel] = {}
                     for line in lines:
-                        ls = str(line)
-                        if ls not in forward[rel]:
-                            forward[rel][ls] = set()
-                        forward[rel][ls].update(matched_facets)
+                        forward[(rel, int(line))].update(matched_facets)
     return forward
 
 
-def parse_lcov(filepath, root, test_to_facets):
-    """Parse LCOV file (whole-suite, no per-test). Returns forward map."""
-    all_facet_ids = list({fid for fids in test_to_facets.values() for fid in fids})
+def parse_lcov(filepath, root, test_to_facets, all_facet_ids=None):
+    """Parse LCOV file (whole-suite, no per-test). Returns forward map.
+
+    Every covered line maps to all_facet_ids, derived from test_to_facets
+    unless the caller already has the set.
+    """
+    if all_facet_ids is None:
+        all_facet_ids = {fid for fids in test_to_facets.values() for fid in fids}
     with open(filepath) as f:
         raw = f.read()
-    forward = {}
-    current_file = None
+    forward = defaultdict(set)
+    rel = None  # current SF: path, relative to root
     for line in raw.splitlines():
-        if line.startswith("SF:"):
-            current_file = line[3:].strip()
-        elif line.startswith("DA:") and current_file:
-            parts = line[3:].split(",")
-            if len(parts) >= 2 and int(parts[1]) > 0:
-                rel = os.path.relpath(current_file, root) if os.path.isabs(current_file) else current_file
-                if rel not in forward:
-                    forward[rel] = {}
-                ls = str(int(parts[0]))
-                if ls not in forward[rel]:
-                    forward[rel][ls] = set()
-                forward[rel][ls].update(all_facet_ids)
+        if line.startswith("DA:"):
+            if rel:
+                # DA:<line>,<hits>[,<checksum>]; hits is a plain decimal, so
+                # only the line number needs converting.
+                parts = line[3:].split(",", 2)
+                if len(parts) >= 2 and parts[1] != "0":
+                    forward[(rel, int(parts[0]))].update(all_facet_ids)
+        elif line.startswith("SF:"):
+            rel = line[3:].strip()
+            if os.path.isabs(rel):
+                rel = os.path.relpath(rel, root)
         elif line.startswith("end_of_record"):
-            current_file = None
+            rel = None
     return forward
 
 
-def parse_cobertura(filepath, root, test_to_facets):
+def parse_cobertura(filepath, root, test_to_facets, all_facet_ids=None):
     """Parse Cobertura XML (whole-suite). Returns forward map."""
-    all_facet_ids = list({fid for fids in test_to_facets.values() for fid in fids})
-    tree = ET.parse(filepath)
-    xml_root = tree.getroot()
-    forward = {}
-    for cls in xml_root.iter("class"):
-        filename = cls.get("filename", "")
-        if not filename:
+    if all_facet_ids is None:
+        all_facet_ids = {fid for fids in test_to_facets.values() for fid in fids}
+    forward = defaultdict(set)
+    rel = None  # file of the enclosing <class>, if any
+    for event, el in ET.iterparse(filepath, events=("start", "end")):
+        tag = el.tag
+        if event == "start":
+            if tag == "class":
+                filename = el.get("filename", "")
+                if filename:
+                    rel = os.path.relpath(filename, root) if os.path.isabs(filename) else filename
             continue
-        rel = os.path.relpath(filename, root) if os.path.isabs(filename) else filename
-        for line_el in cls.iter("line"):
-            line_num = line_el.get("number")
-            hits = int(line_el.get("hits", "0"))
-            if line_num and hits > 0:
-                if rel not in forward:
-                    forward[rel] = {}
-                ls = str(int(line_num))
-                if ls not in forward[rel]:
-                    forward[rel][ls] = set()
-                forward[rel][ls].update(all_facet_ids)
+        if tag == "line":
+            if rel is not None:
+                line_num = el.get("number")
+                if line_num and int(el.get("hits", "0")) > 0:
+                    forward[(rel, int(line_num))].update(all_facet_ids)
+            el.clear()
+        elif tag == "class":
+            rel = None
+            el.clear()
     return forward
 
 
+def _parse_one_lcov(job):
+    """Parse one per-test LCOV file; top-level so process pools can pickle it."""
+    fpath, root, test_id, facet_ids = job
+    return parse_lcov(fpath, root, {test_id: facet_ids}, all_facet_ids=facet_ids)
+
+
 COVERAGE_PARSERS = {
     "coverage-json": parse_coverage_json,
     "lcov": parse_lcov,
@@ -317,51 +510,120 @@ COVERAGE_PARSERS = {
 # Test ID matching
 # ---------------------------------------------------------------------------
 
+# Source extensions are only stripped where they end a path segment
+# ("tests/test_calc.py::test_add"), not inside names like "pyramid".
+_TEST_EXT_RE = re.compile(r"\.(?:py|rs|js|ts|go)(?=$|[:/\\])")
+_TEST_SEP_TABLE = str.maketrans("/\\", "..")
+
+
 def normalize_test_id(test_id):
-    for ext in (".py", ".rs", ".js", ".ts", ".go"):
-        test_id = test_id.replace(ext, "")
-    test_id = test_id.replace("/", ".").replace("\\", ".")
-    return test_id.lower()
+    return _TEST_EXT_RE.sub("", test_id).translate(_TEST_SEP_TABLE).lower()
+
+
+def build_test_id_lookups(test_ids):
+    """Normalized-id and ``::`` suffix lookups over test ids.
+
+    Returns ({normalized_id: test_id}, {lowercased_suffix: test_id}). The
+    first id wins on collisions, matching the old linear-scan order.
+    """
+    by_norm = {}
+    by_suffix = {}
+    for tid in test_ids:
+        by_norm.setdefault(normalize_test_id(tid), tid)
+        if "::" in tid:
+            by_suffix.setdefault(tid.rsplit("::", 1)[-1].lower(), tid)
+    return by_norm, by_suffix
+
+
+def lookup_test_id(test_id, lookups):
+    """Resolve test_id by normalized form, then by ``::`` suffix. None if no match."""
+    by_norm, by_suffix = lookups
+    match = by_norm.get(normalize_test_id(test_id))
+    if match is None and "::" in test_id:
+        match = by_suffix.get(test_id.rsplit("::", 1)[-1].lower())
+    return match
 
 
-def match_test_to_facet(result_ids, facet_test_id):
+def match_test_to_facet(result_ids, facet_test_id, lookups=None):
     if not facet_test_id:
         return None, None
     # Exact
     if facet_test_id in result_ids:
         return facet_test_id, result_ids[facet_test_id]
-    # Normalized
-    norm_facet = normalize_test_id(facet_test_id)
-    for rid, status in result_ids.items():
-        if normalize_test_id(rid) == norm_facet:
-            return rid, status
-    # Suffix
-    if "::" in facet_test_id:
-        facet_suffix = facet_test_id.rsplit("::", 1)[-1].lower()
-        for rid, status in result_ids.items():
-            if "::" in rid:
-                rid_suffix = rid.rsplit("::", 1)[-1].lower()
-                if rid_suffix == facet_suffix:
-                    return rid, status
-    return None, None
+    # Normalized, then suffix
+    rid = lookup_test_id(facet_test_id, lookups or build_test_id_lookups(result_ids))
+    if rid is None:
+        return None, None
+    return rid, result_ids[rid]
 
 # ---------------------------------------------------------------------------
 # Index building
 # ---------------------------------------------------------------------------
 
+def file_fingerprint(path, previous=None):
+    """sha256/mtime/size record for a file.
+
+    The hash from ``previous`` is reused when mtime and size are unchanged,
+    so untouched files are never re-read.
+    """
+    st = os.stat(path)
+    if previous and previous.get("mtime") == st.st_mtime and previous.get("size") == st.st_size:
+        return previous
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return {"sha256": h.hexdigest(), "mtime": st.st_mtime, "size": st.st_size}
+
+
+def build_manifest(root, config, previous=None):
+    """Fingerprint every input build_index reads, keyed by root-relative path."""
+    previous = previous or {}
+    paths = [CATALOG_FILE, BDD_CONFIG_FILE, config["results_file"]]
+    coverage_file = config["coverage_file"]
+    coverage_dir = os.path.join(root, coverage_file)
+    if config["coverage_format"] == "lcov-dir" and os.path.isdir(coverage_dir):
+        paths.extend(os.path.join(coverage_file, fname)
+                     for fname in sorted(os.listdir(coverage_dir)) if fname.endswith(".lcov"))
+    else:
+        paths.append(coverage_file)
+    manifest = {}
+    for rel in paths:
+        full = os.path.join(root, rel)
+        if os.path.isfile(full):
+            manifest[rel] = file_fingerprint(full, previous.get(rel))
+    return manifest
+
+
+def _same_inputs(manifest, previous):
+    if not previous or manifest.keys() != previous.keys():
+        return False
+    return all(manifest[k]["sha256"] == previous[k]["sha256"] for k in manifest)
+
+
 def build_index(root):
-    """Parse results + coverage, match to facets, build forward+reverse maps."""
+    """Parse results + coverage, match to facets, build forward+reverse maps.
+
+    Returns (index, updated, catalog), where catalog carries the refreshed
+    facet statuses, or None without a catalog or config. Skips parsing
+    entirely and returns the saved index when none of the inputs recorded
+    in its manifest have changed content.
+    """
     catalog = load_catalog(root)
     config = load_config(root)
     if not catalog or not config:
         return None
 
-    nodes = catalog["nodes"]
+    previous = load_index(root)
+    manifest = build_manifest(root, config, previous.get("manifest"))
+    if _same_inputs(manifest, previous.get("manifest")):
+        return previous, [], catalog
 
     # Build test_to_facets map
     test_to_facets = {}
-    for n in nodes:
-        if n["type"] == "facet" and n.get("test"):
+    facets = catalog["_by_type"]["facet"]
+    for n in facets:
+        if n.get("test"):
             test_to_facets.setdefault(n["test"], []).append(n["id"])
 
     # Parse test results
@@ -373,15 +635,14 @@ def build_index(root):
             test_results = parser(results_file)
 
     # Match results to facets, update statuses
+    result_lookups = build_test_id_lookups(test_results)
     facet_status = {}
     updated = []
-    for n in nodes:
-        if n["type"] != "facet":
-            continue
+    for n in facets:
         if not n.get("test"):
             facet_status[n["id"]] = n.get("status", "untested")
             continue
-        matched_id, status = match_test_to_facet(test_results, n["test"])
+        matched_id, status = match_test_to_facet(test_results, n["test"], result_lookups)
         if matched_id is not None:
             old = n.get("status", "untested")
             if status == "passed":
@@ -400,73 +661,108 @@ def build_index(root):
     # Save updated statuses
     if updated:
         save_catalog(catalog, root)
+        manifest[CATALOG_FILE] = file_fingerprint(os.path.join(root, CATALOG_FILE))
 
     # Parse coverage
-    forward = {}
+    forward = defaultdict(set)
     coverage_file = os.path.join(root, config["coverage_file"])
     cov_format = config["coverage_format"]
     if cov_format == "lcov-dir":
         # Directory of per-test LCOV files
         if os.path.isdir(coverage_file):
+            facet_test_lookups = build_test_id_lookups(test_to_facets)
+            jobs = []
             for fname in os.listdir(coverage_file):
                 if not fname.endswith(".lcov"):
                     continue
                 test_id = fname[:-5].replace("__", "/")
-                facet_ids = test_to_facets.get(test_id, [])
-                if not facet_ids:
-                    for tid, fids in test_to_facets.items():
-                        if test_id in tid or tid in test_id:
-                            facet_ids.extend(fids)
-                if not facet_ids:
+                tid = test_id if test_id in test_to_facets else lookup_test_id(test_id, facet_test_lookups)
+                if tid is None:
                     continue
-                fpath = os.path.join(coverage_file, fname)
-                partial = parse_lcov(fpath, root, {test_id: facet_ids})
-                for f, lines in partial.items():
-                    if f not in forward:
-                        forward[f] = {}
-                    for ls, fids in lines.items():
-                        if ls not in forward[f]:
-                            forward[f][ls] = set()
-                        forward[f][ls].update(fids)
+                jobs.append((os.path.join(coverage_file, fname), root, test_id, set(test_to_facets[tid])))
+            if len(jobs) >= LCOV_POOL_THRESHOLD:
+                with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+                    partials = list(pool.map(_parse_one_lcov, jobs, chunksize=8))
+            else:
+                partials = map(_parse_one_lcov, jobs)
+            for partial in partials:
+                for key, fids in partial.items():
+                    forward[key].update(fids)
     elif os.path.exists(coverage_file):
         cov_parser = COVERAGE_PARSERS.get(cov_format)
         if cov_parser:
             forward = cov_parser(coverage_file, root, test_to_facets)
 
-    # Convert sets to sorted lists
+    # Pivot into file -> line -> sorted facet ids and build the reverse
+    # map in the same pass. Tuple order sorts by file, then numerically by
+    # line, and each (file, line) key is visited once, so reverse line
+    # lists come out sorted and duplicate-free.
     forward_clean = {}
-    for filepath in sorted(forward):
-        forward_clean[filepath] = {}
-        for ls in sorted(forward[filepath], key=lambda x: int(x)):
-            forward_clean[filepath][ls] = sorted(forward[filepath][ls])
-
-    # Build reverse map
-    reverse = {}
-    for filepath, lines in forward_clean.items():
-        for ls, fids in lines.items():
-            for fid in fids:
-                if fid not in reverse:
-                    reverse[fid] = {}
-                if filepath not in reverse[fid]:
-                    reverse[fid][filepath] = []
-                line_num = int(ls)
-                if line_num not in reverse[fid][filepath]:
-                    reverse[fid][filepath].append(line_num)
-
-    # Sort reverse line lists
-    for fid in reverse:
-        for filepath in reverse[fid]:
-            reverse[fid][filepath].sort()
+    line_numbers = defaultdict(list)  # file -> sorted covered line numbers
+    reverse = defaultdict(lambda: defaultdict(list))
+    for (filepath, line_num), fids in sorted(forward.items()):
+        fids = sorted(fids)
+        forward_clean.setdefault(filepath, {})[str(line_num)] = fids
+        line_numbers[filepath].append(line_num)
+        for fid in fids:
+            reverse[fid][filepath].append(line_num)
 
     index = {
         "forward": forward_clean,
-        "reverse": reverse,
+        "reverse": {fid: dict(files) for fid, files in reverse.items()},
         "test_results": test_results,
         "facet_status": facet_status,
+        "_indexes": {
+            "suffixes": build_file_suffixes(forward_clean),
+            "lines": dict(line_numbers),
+        },
+        "manifest": manifest,
     }
 
     save_index(index, root)
-    return index, updated
+    return index, updated, catalog
+
+
+def build_file_suffixes(files):
+    """Map every trailing path suffix to the indexed files ending with it.
+
+    "src/app/calc.py" is reachable as "calc.py", "app/calc.py" and
+    "src/app/calc.py", so basename and partial-path queries are dict hits.
+    """
+    suffixes = {}
+    for filepath in files:
+        parts = filepath.split("/")
+        for i in range(len(parts)):
+            suffixes.setdefault("/".join(parts[i:]), []).append(filepath)
+    return suffixes
+
+
+def match_index_files(index, file):
+    """Indexed files matching a query: exact path, then path suffix, then substring."""
+    fwd = index.get("forward", {})
+    if file in fwd:
+        return [file]
+    suffixes = index.get("_indexes", {}).get("suffixes")
+    if suffixes is None:
+        suffixes = build_file_suffixes(fwd)
+    matched = suffixes.get(file.strip("/"))
+    if matched:
+        return matched
+    return [f for f in fwd if file in f]
+
+
+def lines_in_range(index, filepath, start_line, end_line):
+    """Covered line keys of filepath within [start_line, end_line], in order.
+
+    Bisects the persisted sorted line list, so the cost follows the size of
+    the range rather than the number of covered lines in the file.
+    """
+    line_nums = index.get("_indexes", {}).get("lines", {}).get(filepath)
+    if line_nums is None:
+        line_nums = sorted(map(int, index["forward"].get(filepath, {})))
+    lo = bisect.bisect_left(line_nums, start_line)
+    hi = bisect.bisect_right(line_nums, end_line)
+    return [str(ln) for ln in line_nums[lo:hi]]
 
 # ---------------------------------------------------------------------------
 # Project root (set via argv)
@@ -498,16 +794,18 @@ def bdd_status(check: str = "") -> str:
     if not catalog:
         return json.dumps({"error": "No catalog.json found"})
     nodes = catalog["nodes"]
-    goals = [n for n in nodes if n["type"] == "goal"]
-    expectations = [n for n in nodes if n["type"] == "expectation"]
-    facets = [n for n in nodes if n["type"] == "facet"]
+    by_id, by_parent, by_type = catalog["_by_id"], catalog["_by_parent"], catalog["_by_type"]
+    goals = by_type["goal"]
+    expectations = by_type["expectation"]
+    facets = by_type["facet"]
     passing = [f for f in facets if f.get("status") == "passing"]
     failing = [f for f in facets if f.get("status") == "failing"]
     untested = [f for f in facets if f.get("status", "untested") == "untested"]
     total = len(facets)
     coverage = (len(passing) / total * 100) if total > 0 else 0
-    satisfied = sum(1 for e in expectations if compute_status(nodes, e) == "passing")
-    unsatisfied_exps = [e for e in expectations if compute_status(nodes, e) != "passing"]
+    node_status = compute_all_statuses(nodes, by_parent)
+    satisfied = sum(1 for e in expectations if node_status.get(e["id"]) == "passing")
+    unsatisfied_exps = [e for e in expectations if node_status.get(e["id"]) != "passing"]
     unsatisfied_exps.sort(key=lambda e: e.get("priority", 99))
 
     lines = [
@@ -520,17 +818,17 @@ def bdd_status(check: str = "") -> str:
         lines.append("")
         lines.append(f"Top unsatisfied ({len(unsatisfied_exps)} total):")
         for exp in unsatisfied_exps[:10]:
-            parent = get_node(nodes, exp.get("parent"))
+            parent = by_id.get(exp.get("parent"))
             prefix = f"{parent['id']}" if parent else "?"
-            status = compute_status(nodes, exp)
+            status = node_status.get(exp["id"], "untested")
             lines.append(f"  {exp['id']} [{status}] {exp['text']}  ({prefix})")
-            for f in get_children(nodes, exp["id"]):
+            for f in by_parent.get(exp["id"], []):
                 if f.get("status", "untested") != "passing":
                     lines.append(f"    {f['id']} [{f.get('status', 'untested')}] {f['text']}")
 
     if check:
         index = load_index(root)
-        check_output = run_checks(nodes, index, check)
+        check_output = run_checks(catalog, index, check)
         if check_output:
             lines.append("")
             lines.append(check_output)
@@ -546,14 +844,16 @@ def bdd_next() -> str:
     if not catalog:
         return json.dumps({"error": "No catalog.json found"})
     nodes = catalog["nodes"]
-    expectations = [n for n in nodes if n["type"] == "expectation"]
-    unsatisfied = [e for e in expectations if compute_status(nodes, e) != "passing"]
+    by_id, by_parent = catalog["_by_id"], catalog["_by_parent"]
+    expectations = catalog["_by_type"]["expectation"]
+    node_status = compute_all_statuses(nodes, by_parent)
+    unsatisfied = [e for e in expectations if node_status.get(e["id"]) != "passing"]
     unsatisfied.sort(key=lambda e: e.get("priority", 99))
     if not unsatisfied:
         return json.dumps({"all_satisfied": True, "message": "All expectations satisfied!"})
     exp = unsatisfied[0]
-    facets = get_children(nodes, exp["id"])
-    parent = get_node(nodes, exp.get("parent"))
+    facets = by_parent.get(exp["id"], [])
+    parent = by_id.get(exp.get("parent"))
     # Format readable output
     lines = []
     if parent:
@@ -588,22 +888,24 @@ def bdd_tree(node_id: str = "", status_filter: str = "", max_depth: int = 0) ->
     if not catalog:
         return json.dumps({"error": "No catalog.json found"})
     nodes = catalog["nodes"]
+    by_id, by_parent = catalog["_by_id"], catalog["_by_parent"]
 
     if node_id:
-        target = get_node(nodes, node_id)
+        target = by_id.get(node_id)
         if not target:
             return f"Node '{node_id}' not found"
         roots = [target]
     else:
-        roots = [n for n in nodes if n.get("parent") is None]
+        roots = list(by_parent.get(None, []))
     roots.sort(key=lambda n: n.get("priority", 99))
 
     lines = []
+    node_status = compute_all_statuses(nodes, by_parent)
 
     def should_show(node):
         if not status_filter:
             return True
-        s = compute_status(nodes, node)
+        s = node_status.get(node["id"], "untested")
         if status_filter == "unsatisfied":
             return s != "passing"
         if status_filter == "failing":
@@ -614,25 +916,28 @@ def bdd_tree(node_id: str = "", status_filter: str = "", max_depth: int = 0) ->
             return s == "passing"
         return True
 
-    def print_tree(node, indent=0, depth=1):
-        if max_depth and depth > max_depth:
-            return
-        status = compute_status(nodes, node)
+    if not roots:
+        return "Catalog is empty. Use bdd_add to get started."
+
+    # Pre-order walk with an explicit stack of (node, indent, depth);
+    # children are pushed in reverse so they pop in priority order.
+    # Nodes already emitted are skipped, so a parent cycle ends the walk.
+    stack = [(r, 0, 1) for r in reversed(roots) if should_show(r)]
+    seen = set()
+    while stack:
+        node, indent, depth = stack.pop()
+        if (max_depth and depth > max_depth) or node["id"] in seen:
+            continue
+        seen.add(node["id"])
+        status = node_status.get(node["id"], "untested")
         icon = status_icon(status)
         prefix = "  " * indent
         type_label = node["type"][0].upper()
         lines.append(f"{prefix}{icon} {node['id']} [{type_label}] {node['text']}")
-        children = get_children(nodes, node["id"])
-        children.sort(key=lambda n: n.get("priority", 99))
-        for c in children:
-            if should_show(c):
-                print_tree(c, indent + 1, depth + 1)
-
-    if not roots:
-        return "Catalog is empty. Use bdd_add to get started."
-    for r in roots:
-        if should_show(r):
-            print_tree(r)
+        children = sorted(by_parent.get(node["id"], []), key=lambda n: n.get("priority", 99))
+        for c in reversed(children):
+            if c["id"] not in seen and should_show(c):
+                stack.append((c, indent + 1, depth + 1))
 
     if not lines:
         return f"No nodes match filter (status_filter={status_filter!r})"
@@ -653,53 +958,58 @@ def bdd_motivation(file: str, start_line: int = 0, end_line: int = 0) -> str:
     catalog = load_catalog(root)
     if not catalog:
         return json.dumps({"error": "No catalog.json found"})
-    nodes = catalog["nodes"]
     fwd = index.get("forward", {})
 
-    # Find matching files (substring match)
-    matched_files = {f: lines for f, lines in fwd.items() if file in f}
+    matched_files = {f: fwd[f] for f in match_index_files(index, file)}
     if not matched_files:
         return f"No catalog entries related to {file}"
 
     facet_ids = set()
     for src_file, line_map in matched_files.items():
-        for ls, fids in line_map.items():
-            if start_line and end_line:
-                if not (start_line <= int(ls) <= end_line):
-                    continue
-            for fid in fids:
-                facet_ids.add(fid)
+        if start_line and end_line:
+            for ls in lines_in_range(index, src_file, start_line, end_line):
+                facet_ids.update(line_map[ls])
+        else:
+            for fids in line_map.values():
+                facet_ids.update(fids)
 
     if not facet_ids:
         return f"No catalog entries for {file}" + (f" lines {start_line}-{end_line}" if start_line else "")
 
-    # Build a tree from the facet chains, deduplicating shared ancestors
+    # Build a tree from the facet chains, deduplicating shared ancestors.
+    # Each facet climbs only until it reaches a node already in the tree.
     # tree_nodes[node_id] = {children: set(), node: dict}
+    by_id = catalog["_by_id"]
     tree_nodes = {}
     tree_roots = set()
     for fid in sorted(facet_ids):
-        chain = get_ancestor_chain(nodes, fid)
-        for i, n in enumerate(chain):
-            if n["id"] not in tree_nodes:
-                tree_nodes[n["id"]] = {"node": n, "children": set()}
-            if i > 0:
-                tree_nodes[chain[i - 1]["id"]]["children"].add(n["id"])
-            else:
-                tree_roots.add(n["id"])
+        child_id = None
+        current = by_id.get(fid)
+        while current:
+            nid = current["id"]
+            if nid in tree_nodes:
+                if child_id:
+                    tree_nodes[nid]["children"].add(child_id)
+                break
+            tree_nodes[nid] = {"node": current, "children": {child_id} if child_id else set()}
+            child_id = nid
+            pid = current.get("parent")
+            current = by_id.get(pid) if pid else None
+            if current is None:
+                tree_roots.add(nid)
 
     lines = ["--- This code exists because ---"]
 
-    def render(nid, indent=0):
+    stack = [(rid, 0) for rid in sorted(tree_roots, reverse=True)]
+    while stack:
+        nid, indent = stack.pop()
         tn = tree_nodes[nid]
         n = tn["node"]
         prefix = "  " * indent
         type_label = n["type"][0].upper()
         lines.append(f"  {prefix}{n['id']} [{type_label}] {n['text']}")
-        for cid in sorted(tn["children"]):
-            render(cid, indent + 1)
-
-    for rid in sorted(tree_roots):
-        render(rid)
+        for cid in sorted(tn["children"], reverse=True):
+            stack.append((cid, indent + 1))
     lines.append("---")
     return "\n".join(lines)
 
@@ -716,8 +1026,8 @@ def bdd_locate(node_id: str) -> str:
     catalog = load_catalog(root)
     if not catalog:
         return json.dumps({"error": "No catalog.json found"})
-    nodes = catalog["nodes"]
-    node = get_node(nodes, node_id)
+    by_id, by_parent = catalog["_by_id"], catalog["_by_parent"]
+    node = by_id.get(node_id)
     if not node:
         return f"Node '{node_id}' not found"
 
@@ -728,28 +1038,25 @@ def bdd_locate(node_id: str) -> str:
         target_ids = [node_id]
     else:
         target_ids = []
-
-        def collect_facets(nid):
-            n = get_node(nodes, nid)
-            if not n:
-                return
+        stack = [node]
+        seen = set()
+        while stack:
+            n = stack.pop()
+            if n["id"] in seen:
+                continue
+            seen.add(n["id"])
             if n["type"] == "facet":
-                target_ids.append(nid)
-            for child in get_children(nodes, nid):
-                collect_facets(child["id"])
-
-        collect_facets(node_id)
+                target_ids.append(n["id"])
+            stack.extend(c for c in reversed(by_parent.get(n["id"], [])) if c["id"] not in seen)
 
     if not target_ids:
         return f"No facets found under {node_id}"
 
     # Gather all files and lines
-    file_lines = {}  # file -> set(lines)
+    file_lines = defaultdict(set)  # file -> set(lines)
     for fid in target_ids:
         if fid in reverse:
             for filepath, lines in reverse[fid].items():
-                if filepath not in file_lines:
-                    file_lines[filepath] = set()
                 file_lines[filepath].update(lines)
 
     if not file_lines:
@@ -799,7 +1106,7 @@ def bdd_add(node_type: str, text: str, parent: str = "", priority: int = 1, labe
     root = get_root()
     catalog = load_catalog(root)
     if not catalog:
-        catalog = {"version": 1, "nodes": []}
+        catalog = reindex_catalog({"version": 1, "nodes": []})
     nodes = catalog["nodes"]
 
     if node_type not in TYPE_PREFIX:
@@ -810,23 +1117,25 @@ def bdd_add(node_type: str, text: str, parent: str = "", priority: int = 1, labe
     # Auto-resolve parent
     if not parent_id:
         if node_type == "expectation":
-            goals = [n for n in nodes if n["type"] == "goal"]
+            goals = catalog["_by_type"]["goal"]
             if len(goals) == 1:
                 parent_id = goals[0]["id"]
             elif len(goals) > 1:
                 return "Error: Multiple goals exist. Specify parent."
         elif node_type == "facet":
-            expectations = [n for n in nodes if n["type"] == "expectation"]
+            expectations = catalog["_by_type"]["expectation"]
             if len(expectations) == 1:
                 parent_id = expectations[0]["id"]
             elif len(expectations) > 1:
                 return "Error: Multiple expectations exist. Specify parent."
 
     # Validate parent exists
-    if parent_id and not get_node(nodes, parent_id):
+    if parent_id and parent_id not in catalog["_by_id"]:
         return f"Error: Parent '{parent_id}' not found."
 
-    new_id = next_id(nodes, TYPE_PREFIX[node_type])
+    if "_counters" not in catalog:
+        catalog["_counters"] = scan_id_counters(nodes)
+    new_id = next_id(nodes, TYPE_PREFIX[node_type], catalog["_counters"])
     node = {
         "id": new_id,
         "type": node_type,
@@ -842,6 +1151,9 @@ def bdd_add(node_type: str, text: str, parent: str = "", priority: int = 1, labe
         node["status"] = "untested"
 
     nodes.append(node)
+    catalog["_by_id"][new_id] = node
+    catalog["_by_parent"].setdefault(parent_id, []).append(node)
+    catalog["_by_type"][node_type].append(node)
     save_catalog(catalog, root)
     result = f"Added {node_type}: {new_id} — {text}"
     if parent_id:
@@ -861,8 +1173,7 @@ def bdd_link(facet_id: str, test_id: str) -> str:
     catalog = load_catalog(root)
     if not catalog:
         return "Error: No catalog.json found"
-    nodes = catalog["nodes"]
-    node = get_node(nodes, facet_id)
+    node = catalog["_by_id"].get(facet_id)
     if not node:
         return f"Error: Node '{facet_id}' not found."
     if node["type"] != "facet":
@@ -901,38 +1212,69 @@ def bdd_test() -> str:
     if build_result is None:
         return json.dumps({"error": "Failed to build index"})
 
-    index, updated = build_result
-
-    # Compute summary
-    catalog = load_catalog(root)  # reload after updates
-    nodes = catalog["nodes"]
-    facets = [n for n in nodes if n["type"] == "facet"]
-    passing = [f for f in facets if f.get("status") == "passing"]
-    failing = [f for f in facets if f.get("status") == "failing"]
-    untested = [f for f in facets if f.get("status", "untested") == "untested"]
-    expectations = [n for n in nodes if n["type"] == "expectation"]
-    satisfied = sum(1 for e in expectations if compute_status(nodes, e) == "passing")
-    all_satisfied = satisfied == len(expectations) and len(expectations) > 0
+    index, updated, catalog = build_result
 
+    summary = summarize_results(catalog)
     return json.dumps({
         "test_exit_code": test_exit_code,
         "results_parsed": len(index.get("test_results", {})),
         "facets_updated": updated,
-        "passing": len(passing),
-        "failing": len(failing),
-        "untested": len(untested),
-        "satisfied": satisfied,
-        "total_expectations": len(expectations),
-        "all_satisfied": all_satisfied,
+        **summary,
         "index_files": len(index.get("forward", {})),
     })
 
 
-def run_checks(nodes, index, category):
+def summarize_results(catalog):
+    """Facet status counts and expectation satisfaction after a test run.
+
+    Expectation statuses come from one bottom-up compute_all_statuses pass
+    rather than a separate roll-up per expectation.
+    """
+    by_type = catalog["_by_type"]
+    statuses = compute_all_statuses(catalog["nodes"], catalog["_by_parent"])
+    counts = {"passing": 0, "failing": 0, "untested": 0}
+    for n in by_type["facet"]:
+        status = n.get("status", "untested")
+        if status in counts:
+            counts[status] += 1
+    expectations = by_type["expectation"]
+    total_expectations = len(expectations)
+    satisfied = sum(1 for e in expectations if statuses.get(e["id"]) == "passing")
+    return {
+        **counts,
+        "satisfied": satisfied,
+        "total_expectations": total_expectations,
+        "all_satisfied": satisfied == total_expectations and total_expectations > 0,
+    }
+
+
+def plural(n, word):
+    """'1 issue', '3 issues': n followed by word, pluralized with a plain 's'."""
+    return f"{n} {word}" if n == 1 else f"{n} {word}s"
+
+
+STOPWORDS = frozenset({
+    "the", "a", "an", "is", "are", "was", "were", "be", "been",
+    "being", "have", "has", "had", "do", "does", "did", "will",
+    "would", "could", "should", "may", "might", "can", "shall",
+    "to", "of", "in", "for", "on", "with", "at", "by", "from",
+    "it", "its", "this", "that", "and", "or", "not", "no", "but",
+    "if", "then", "than", "so", "as", "up", "out", "about",
+})
+_PUNCT_TRANS = str.maketrans("", "", ".,;:!?\"'()-")
+
+
+def keywords(text):
+    """Lowercased non-stopword words of text, punctuation removed."""
+    return {w for w in text.lower().translate(_PUNCT_TRANS).split()
+            if len(w) > 1 and w not in STOPWORDS}
+
+
+def run_checks(catalog, index, category):
     """Run catalog health checks. Returns diagnostic string.
 
     Args:
-        nodes: catalog nodes list
+        catalog: loaded catalog dict, with its _by_id/_by_parent/_by_type lookups
         index: loaded index dict
         category: one of: overload, overlap, structural, status, coverage, semantic, all. Empty = all.
     """
@@ -940,7 +1282,16 @@ def run_checks(nodes, index, category):
     reverse = index.get("reverse", {})
     test_results = index.get("test_results", {})
 
-    node_map = {n["id"]: n for n in nodes}
+    # Every section below reuses the catalog's lookups, through node_get and
+    # a shared read-only EMPTY default for missing nodes.
+    nodes = catalog["nodes"]
+    node_map, children_by_parent = catalog["_by_id"], catalog["_by_parent"]
+    node_get = node_map.get
+    EMPTY = {}
+    by_type = catalog["_by_type"]
+    facets = by_type["facet"]
+    linked_facets = [f for f in facets if f.get("test")]
+    result_lookups = build_test_id_lookups(test_results)
 
     all_categories = ("overload", "overlap", "structural", "status", "coverage", "semantic")
     if category and category != "all" and category not in all_categories:
@@ -953,21 +1304,20 @@ def run_checks(nodes, index, category):
 
     # --- Overload: multiple facets linked to the same test ---
     if "overload" in cats:
-        test_to_facets = {}
-        for n in nodes:
-            if n["type"] == "facet" and n.get("test"):
-                test_to_facets.setdefault(n["test"], []).append(n)
+        test_to_facets = defaultdict(list)
+        for n in linked_facets:
+            test_to_facets[n["test"]].append(n)
         issues = []
-        for tid, facets in sorted(test_to_facets.items()):
-            if len(facets) > 1:
-                lines = [f'  [!] "{tid}" shared by {len(facets)} facets:']
-                for f in facets:
-                    parent = node_map.get(f.get("parent"), {})
+        for tid, shared in sorted(test_to_facets.items()):
+            if len(shared) > 1:
+                lines = [f'  [!] "{tid}" shared by {len(shared)} facets:']
+                for f in shared:
+                    parent = node_get(f.get("parent"), EMPTY)
                     pid = parent.get("id", "?")
                     lines.append(f"      {f['id']} ({pid}) {f['text']}")
                 issues.append("\n".join(lines))
         if issues:
-            sections.append(f"--- Test Overload ({len(issues)} issue{'s' if len(issues) != 1 else ''}) ---\n" + "\n\n".join(issues))
+            sections.append(f"--- Test Overload ({plural(len(issues), 'issue')}) ---\n" + "\n\n".join(issues))
             total_issues += len(issues)
 
     # --- Overlap: facets from DIFFERENT expectations sharing source lines ---
@@ -977,7 +1327,7 @@ def run_checks(nodes, index, category):
             for ls, fids in line_map.items():
                 by_exp = {}
                 for fid in fids:
-                    fnode = node_map.get(fid)
+                    fnode = node_get(fid)
                     if not fnode:
                         continue
                     exp_id = fnode.get("parent", "?")
@@ -992,36 +1342,30 @@ def run_checks(nodes, index, category):
 
             issues = []
             for fp in sorted(by_file):
-                entries = sorted(by_file[fp], key=lambda x: x[0])
-                # Merge contiguous lines into ranges
+                entries = sorted(by_file[fp], key=itemgetter(0))
+                # Merge contiguous lines into ranges: line numbers are unique
+                # per file, so line - position is constant along each run.
                 ranges = []
-                rng_start = entries[0][0]
-                rng_end = entries[0][0]
-                rng_facets = {}
-                for ln, by_exp in entries:
-                    if ln <= rng_end + 1:
-                        rng_end = ln
-                    else:
-                        ranges.append((rng_start, rng_end, dict(rng_facets)))
-                        rng_start = ln
-                        rng_end = ln
-                        rng_facets = {}
-                    for eid, fnodes in by_exp.items():
-                        rng_facets.setdefault(eid, set()).update(f["id"] for f in fnodes)
-                ranges.append((rng_start, rng_end, dict(rng_facets)))
+                for _, run in groupby(enumerate(entries), key=lambda x: x[1][0] - x[0]):
+                    run = [entry for _, entry in run]
+                    rng_facets = defaultdict(set)
+                    for _, by_exp in run:
+                        for eid, fnodes in by_exp.items():
+                            rng_facets[eid].update(f["id"] for f in fnodes)
+                    ranges.append((run[0][0], run[-1][0], rng_facets))
 
                 for s, e, exp_facets in ranges:
                     rng_str = f"{s}-{e}" if s != e else str(s)
                     lines = [f"  [!] {fp}:{rng_str} claimed by different expectations:"]
                     for eid, fid_set in sorted(exp_facets.items()):
-                        exp_node = node_map.get(eid, {})
+                        exp_node = node_get(eid, EMPTY)
                         exp_text = exp_node.get("text", "?")
                         for fid in sorted(fid_set):
-                            fnode = node_map.get(fid, {})
+                            fnode = node_get(fid, EMPTY)
                             lines.append(f"      {fid} ({eid}: {exp_text}) {fnode.get('text', '?')}")
                     issues.append("\n".join(lines))
             if issues:
-                sections.append(f"--- Code Overlap ({len(issues)} issue{'s' if len(issues) != 1 else ''}) ---\n" + "\n\n".join(issues))
+                sections.append(f"--- Code Overlap ({plural(len(issues), 'issue')}) ---\n" + "\n\n".join(issues))
                 total_issues += len(issues)
 
     # --- Structural: orphans, cycles, duplicates, empty expectations, type hierarchy ---
@@ -1035,17 +1379,26 @@ def run_checks(nodes, index, category):
             if pid and pid not in id_set:
                 issues.append(f'  [!] Orphan: {n["id"]} parent "{pid}" does not exist')
 
-        # Cycle detection
+        # Cycle detection: climb from each unvisited node, marking the walk
+        # GRAY; reaching a GRAY node closes a cycle, reaching a BLACK one
+        # joins an already-checked chain. Each node is climbed past once and
+        # each cycle is reported once.
+        GRAY, BLACK = 1, 2
+        color = {}
         for n in nodes:
-            visited = set()
+            walk = []
             cur = n
-            while cur:
-                if cur["id"] in visited:
-                    issues.append(f'  [!] Cycle: {n["id"]} has circular parent chain')
-                    break
-                visited.add(cur["id"])
+            while cur and cur["id"] not in color:
+                color[cur["id"]] = GRAY
+                walk.append(cur["id"])
                 pid = cur.get("parent")
-                cur = node_map.get(pid) if pid else None
+                cur = node_get(pid) if pid else None
+            if cur and color[cur["id"]] == GRAY:
+                cycle = walk[walk.index(cur["id"]):]
+                chain = " -> ".join(cycle + [cycle[0]])
+                issues.append(f'  [!] Cycle: {chain} is a circular parent chain')
+            for nid in walk:
+                color[nid] = BLACK
 
         # Duplicate text
         seen_texts = {}
@@ -1057,18 +1410,16 @@ def run_checks(nodes, index, category):
                 seen_texts[key] = n["id"]
 
         # Empty expectations
-        for n in nodes:
-            if n["type"] == "expectation":
-                children = [c for c in nodes if c.get("parent") == n["id"]]
-                if not children:
-                    issues.append(f'  [!] Empty: {n["id"]} "{n["text"]}" has no facets')
+        for n in by_type["expectation"]:
+            if not children_by_parent.get(n["id"]):
+                issues.append(f'  [!] Empty: {n["id"]} "{n["text"]}" has no facets')
 
         # Type hierarchy violations
         valid_parent_type = {"goal": (None,), "expectation": ("goal",), "facet": ("expectation",)}
         for n in nodes:
             pid = n.get("parent")
             if pid:
-                parent_node = node_map.get(pid)
+                parent_node = node_get(pid)
                 if parent_node:
                     allowed = valid_parent_type.get(n["type"], ())
                     if parent_node["type"] not in allowed:
@@ -1077,16 +1428,14 @@ def run_checks(nodes, index, category):
                 issues.append(f'  [!] Hierarchy: {n["id"]} ({n["type"]}) has no parent (only goals can be root)')
 
         if issues:
-            sections.append(f"--- Structural ({len(issues)} issue{'s' if len(issues) != 1 else ''}) ---\n" + "\n".join(issues))
+            sections.append(f"--- Structural ({plural(len(issues), 'issue')}) ---\n" + "\n".join(issues))
             total_issues += len(issues)
 
     # --- Status: facet status disagrees with test results ---
     if "status" in cats:
         issues = []
-        for n in nodes:
-            if n["type"] != "facet" or not n.get("test"):
-                continue
-            matched_id, result = match_test_to_facet(test_results, n["test"])
+        for n in linked_facets:
+            matched_id, result = match_test_to_facet(test_results, n["test"], result_lookups)
             if matched_id is None:
                 continue
             stored = n.get("status", "untested")
@@ -1096,68 +1445,81 @@ def run_checks(nodes, index, category):
                 issues.append(f'  [!] {n["id"]} test failed but status is "{stored}"')
 
         if issues:
-            sections.append(f"--- Status Mismatch ({len(issues)} issue{'s' if len(issues) != 1 else ''}) ---\n" + "\n".join(issues))
+            sections.append(f"--- Status Mismatch ({plural(len(issues), 'issue')}) ---\n" + "\n".join(issues))
             total_issues += len(issues)
 
     # --- Coverage: facet test passes but no lines in reverse index ---
     if "coverage" in cats:
         issues = []
-        for n in nodes:
-            if n["type"] != "facet" or not n.get("test"):
-                continue
-            matched_id, result = match_test_to_facet(test_results, n["test"])
+        for n in linked_facets:
+            matched_id, result = match_test_to_facet(test_results, n["test"], result_lookups)
             if result != "passed":
                 continue
             if n["id"] not in reverse:
                 issues.append(f'  [!] {n["id"]} "{n["text"]}" test passes but has no coverage lines')
 
         if issues:
-            sections.append(f"--- Coverage Gap ({len(issues)} issue{'s' if len(issues) != 1 else ''}) ---\n" + "\n".join(issues))
+            sections.append(f"--- Coverage Gap ({plural(len(issues), 'issue')}) ---\n" + "\n".join(issues))
             total_issues += len(issues)
 
     # --- Semantic: candidate contradictions between different expectations ---
     if "semantic" in cats:
-        STOPWORDS = {"the", "a", "an", "is", "are", "was", "were", "be", "been",
-                     "being", "have", "has", "had", "do", "does", "did", "will",
-                     "would", "could", "should", "may", "might", "can", "shall",
-                     "to", "of", "in", "for", "on", "with", "at", "by", "from",
-                     "it", "its", "this", "that", "and", "or", "not", "no", "but",
-                     "if", "then", "than", "so", "as", "up", "out", "about"}
-
-        def keywords(text):
-            words = set()
-            for w in text.lower().split():
-                w = w.strip(".,;:!?\"'()-")
-                if len(w) > 1 and w not in STOPWORDS:
-                    words.add(w)
-            return words
-
-        facets = [n for n in nodes if n["type"] == "facet"]
+        # Candidate pairs come from inverted indexes: facets sharing a
+        # keyword or a covered (file, line). Only those are verified, in
+        # catalog order, instead of every facet pair.
+        kw_by_facet = [keywords(f["text"]) for f in facets]
+        postings = defaultdict(list)
+        for i, kws in enumerate(kw_by_facet):
+            for word in kws:
+                postings[word].append(i)
+        positions = defaultdict(list)
+        for i, f in enumerate(facets):
+            positions[f["id"]].append(i)
+        # Each facet's covered lines are frozen once per file, so verifying
+        # a pair below is C-level set work with no per-pair set building.
+        covered = {}
+        for fid, files in reverse.items():
+            if fid not in positions:
+                continue
+            covered[fid] = {fp: frozenset(line_nums) for fp, line_nums in files.items()}
+            for fp, line_nums in files.items():
+                for ln in line_nums:
+                    postings[(fp, ln)].extend(positions[fid])
+        candidates = set()
+        for posting in postings.values():
+            if len(posting) > 1:
+                candidates.update(combinations(sorted(set(posting)), 2))
+
         pairs = []
-        for i in range(len(facets)):
-            for j in range(i + 1, len(facets)):
-                a, b = facets[i], facets[j]
-                if a.get("parent") == b.get("parent"):
-                    continue
+        add_pair = pairs.append
+        cov_get = covered.get
+        for i, j in sorted(candidates):
+            a, b = facets[i], facets[j]
+            if a.get("parent") == b.get("parent"):
+                continue
 
-                shared_files = set()
-                a_rev = reverse.get(a["id"], {})
-                b_rev = reverse.get(b["id"], {})
-                for fp in set(a_rev) & set(b_rev):
-                    if set(a_rev[fp]) & set(b_rev[fp]):
-                        shared_files.add(fp)
-
-                kw_a = keywords(a["text"])
-                kw_b = keywords(b["text"])
-                shared_kw = kw_a & kw_b
-
-                if shared_files or len(shared_kw) >= 2:
-                    detail = []
-                    if shared_files:
-                        detail.append(f"Shared code: {', '.join(sorted(shared_files))}")
-                    if shared_kw:
-                        detail.append(f"Shared keywords: {', '.join(sorted(shared_kw))}")
-                    pairs.append((a, b, detail))
+            # Keywords are the cheap signal; with fewer than two shared, the
+            # pair only qualifies on shared code, so bail before the line
+            # intersection when either side has no coverage at all.
+            shared_kw = kw_by_facet[i] & kw_by_facet[j]
+            kw_match = len(shared_kw) >= 2
+            a_cov = cov_get(a["id"])
+            b_cov = cov_get(b["id"]) if a_cov else None
+            if not (a_cov and b_cov):
+                if kw_match:
+                    add_pair((a, b, [f"Shared keywords: {', '.join(sorted(shared_kw))}"]))
+                continue
+
+            shared_files = {fp for fp in a_cov.keys() & b_cov.keys()
+                            if not a_cov[fp].isdisjoint(b_cov[fp])}
+            if not (shared_files or kw_match):
+                continue
+            detail = []
+            if shared_files:
+                detail.append(f"Shared code: {', '.join(sorted(shared_files))}")
+            if shared_kw:
+                detail.append(f"Shared keywords: {', '.join(sorted(shared_kw))}")
+            add_pair((a, b, detail))
 
         if pairs:
             issues = []
@@ -1169,7 +1531,7 @@ def run_checks(nodes, index, category):
                 for d in detail:
                     lines.append(f"      {d}")
                 issues.append("\n".join(lines))
-            sections.append(f"--- Semantic Candidates ({len(pairs)} pair{'s' if len(pairs) != 1 else ''}) ---\n" + "\n\n".join(issues))
+            sections.append(f"--- Semantic Candidates ({plural(len(pairs), 'pair')}) ---\n" + "\n\n".join(issues))
             total_review += len(pairs)
 
     # --- Build final report ---
@@ -1181,9 +1543,9 @@ def run_checks(nodes, index, category):
     parts.append("")
     summary_parts = []
     if total_issues:
-        summary_parts.append(f"{total_issues} issue{'s' if total_issues != 1 else ''}")
+        summary_parts.append(plural(total_issues, "issue"))
     if total_review:
-        summary_parts.append(f"{total_review} review candidate{'s' if total_review != 1 else ''}")
+        summary_parts.append(plural(total_review, "review candidate"))
     parts.append(f"=== {', '.join(summary_parts)} ===")
     return "\n".join(parts)
 
@@ -1214,7 +1576,7 @@ def run_tests_cli(root):
         print("Error: Failed to build index", file=sys.stderr)
         sys.exit(1)
 
-    index, updated = build_result
+    index, updated, catalog = build_result
 
     # Print updates
     if updated:
@@ -1224,24 +1586,16 @@ def run_tests_cli(root):
             print(f"  {u['id']}: {u['old']} -> {u['new']}")
 
     # Summary
-    catalog = load_catalog(root)
-    nodes = catalog["nodes"]
-    facets = [n for n in nodes if n["type"] == "facet"]
-    passing = [f for f in facets if f.get("status") == "passing"]
-    failing = [f for f in facets if f.get("status") == "failing"]
-    untested = [f for f in facets if f.get("status", "untested") == "untested"]
-    expectations = [n for n in nodes if n["type"] == "expectation"]
-    satisfied = sum(1 for e in expectations if compute_status(nodes, e) == "passing")
-    all_satisfied = satisfied == len(expectations) and len(expectations) > 0
+    summary = summarize_results(catalog)
 
     print()
     print(f"Results: {len(index.get('test_results', {}))} tests parsed")
-    print(f"Facets:  {len(passing)} passing, {len(failing)} failing, {len(untested)} untested")
-    print(f"Expectations: {satisfied}/{len(expectations)} satisfied")
-    if all_satisfied:
+    print(f"Facets:  {summary['passing']} passing, {summary['failing']} failing, {summary['untested']} untested")
+    print(f"Expectations: {summary['satisfied']}/{summary['total_expectations']} satisfied")
+    if summary["all_satisfied"]:
         print("All expectations satisfied!")
 
-    sys.exit(0 if all_satisfied else 1)
+    sys.exit(0 if summary["all_satisfied"] else 1)
 
 # ---------------------------------------------------------------------------
 # Main
@@ -1323,7 +1677,7 @@ def cli_query(args):
             print("No catalog.json found")
             sys.exit(1)
         index = load_index(root)
-        print(run_checks(catalog["nodes"], index, category=rest[0] if rest else ""))
+        print(run_checks(catalog, index, category=rest[0] if rest else ""))
     else:
         print(f"Unknown tool: {tool}")
         print("Available: status, next, tree, motivation, locate, test, add, link, check")
@@ -1,17 +1,34 @@
 #!/usr/bin/env python3
 """Analyze bench results and produce comparison tables."""
 
+import calendar
+import gzip
+import heapq
+import io
 import json
+import os
 import re
 import sys
+import time
+from bisect import bisect_left
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from functools import lru_cache, partial
+from itertools import compress, groupby
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used without it
+    orjson = None
 
 
 # --- Treatment classification ---
 
 # Treatments known to use subagents (for metrics missing tool_breakdown)
-AGENT_TREATMENTS = {"planner-agent", "verifier-agent", "prompt-decompose", "scout-swarm"}
+AGENT_TREATMENTS = frozenset({"planner-agent", "verifier-agent", "prompt-decompose", "scout-swarm"})
 
 # Hook injection variant by treatment name
 # Standard context-injection hooks fall through to "standard" at runtime.
@@ -29,9 +46,9 @@ HOOK_VARIANTS = {
 
 # Hook-only treatments (have hooks configured but no MCP server).
 # Used in diagnosis to avoid false-positive "MCP available but unused" warnings.
-HOOKS_NO_MCP_TREATMENTS = {
+HOOKS_NO_MCP_TREATMENTS = frozenset({
     "edit-guard", "regression-feedback", "review-before-stop",
-}
+})
 
 # Treatment tier classification.
 # Tiers group treatments by the BDD mechanism stack they rely on.
@@ -78,6 +95,19 @@ TIER_ORDER = [
     "none", "context-only", "mcp-only", "hooks-only", "hooks+mcp", "agent",
 ]
 
+# Data-driven tier for treatments missing from TREATMENT_TIERS,
+# keyed by (has_agents, has_mcp, has_hooks).
+_TIER_FALLBACK = {
+    (True, True, True): "agent",
+    (True, True, False): "agent",
+    (True, False, True): "agent",
+    (True, False, False): "agent",
+    (False, True, True): "hooks+mcp",
+    (False, False, True): "hooks-only",
+    (False, True, False): "mcp-only",
+    (False, False, False): "none",
+}
+
 TIER_LABELS = {
     "none":         "No BDD",
     "context-only": "Context only",
@@ -127,18 +157,7 @@ def classify_run(r: dict) -> dict:
     context_volume = r.get("hook_injections", 0) + r.get("mcp_tool_calls", 0)
 
     # Treatment tier (falls back to data-driven guess if treatment not in map)
-    tier = TREATMENT_TIERS.get(treatment, "")
-    if not tier:
-        if has_agents:
-            tier = "agent"
-        elif has_hooks and has_mcp:
-            tier = "hooks+mcp"
-        elif has_hooks:
-            tier = "hooks-only"
-        elif has_mcp:
-            tier = "mcp-only"
-        else:
-            tier = "none"
+    tier = TREATMENT_TIERS.get(treatment) or _TIER_FALLBACK[(has_agents, has_mcp, has_hooks)]
 
     return {
         "has_hooks": has_hooks,
@@ -163,9 +182,28 @@ def classify_run(r: dict) -> dict:
     }
 
 
-def engagement_tag(r: dict) -> str:
-    """Short tag for detail table: shows BDD engagement at a glance."""
+# id(run) -> (run, classify_run(run)). The run is held so its id cannot be
+# reused; kept outside the dict so the HTML payload does not carry it.
+_classified: dict[int, tuple[dict, dict]] = {}
+
+
+def _classification(r: dict) -> dict:
+    """classify_run(r), computed once per run and shared by every table."""
+    hit = _classified.get(id(r))
+    if hit is not None and hit[0] is r:
+        return hit[1]
     c = classify_run(r)
+    _classified[id(r)] = (r, c)
+    return c
+
+
+def engagement_tag(r: dict, c: dict | None = None) -> str:
+    """Short tag for detail table: shows BDD engagement at a glance.
+
+    Pass *c*, the run's classify_run() result, when it is already at hand.
+    """
+    if c is None:
+        c = _classification(r)
     parts = []
     if c["has_agents"]:
         parts.append("A")
@@ -181,13 +219,13 @@ def engagement_tag(r: dict) -> str:
 def enrich_results(results: list[dict]) -> list[dict]:
     """Add computed classification fields to each result dict (mutates in place)."""
     for r in results:
-        c = classify_run(r)
+        c = _classification(r)
         r["_tier"] = c["tier"]
         r["_tier_label"] = TIER_LABELS.get(c["tier"], c["tier"])
         r["_engagement"] = c["engagement"]
         r["_hook_variant"] = c["hook_variant"]
         r["_context_volume"] = c["context_volume"]
-        r["_engagement_tag"] = engagement_tag(r)
+        r["_engagement_tag"] = engagement_tag(r, c)
         r["_has_hooks"] = c["has_hooks"]
         r["_has_mcp"] = c["has_mcp"]
         r["_has_agents"] = c["has_agents"]
@@ -202,48 +240,124 @@ def _is_rate_limited(data: dict) -> bool:
     return data.get("tokens_total", 0) == 0 and data.get("budget_used_usd", 0) == 0
 
 
-def load_results(results_dir: Path, since: str = "") -> tuple[list[dict], int]:
-    """Load single-task metrics.json files from results directory (excludes sequences).
+# Cheap byte-level peeks at metrics.json fields, so files that are about
+# to be discarded never go through a full JSON parse. A peek can't tell a
+# top-level field from a nested one, so it is only trusted when the key
+# occurs once in the file.
+_SEQUENCE_RE = re.compile(rb'"type":\s*"sequence"')
+_TIMESTAMP_KEY = b'"timestamp"'
+_TIMESTAMP_RE = re.compile(rb'"timestamp":\s*"([^"\\]*)"')
+_RATE_LIMITED_PEEKS = (
+    (b'"tokens_total"', re.compile(rb'"tokens_total":\s*0\s*[,}]')),
+    (b'"budget_used_usd"', re.compile(rb'"budget_used_usd":\s*0(?:\.0+)?\s*[,}]')),
+)
+
+
+def _loads(raw: bytes):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _dumps(data) -> bytes:
+    """UTF-8 JSON for the HTML payload; values JSON can't hold become str()."""
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=str).encode()
+
+
+def _find_metrics_files(results_dir: Path) -> list[Path]:
+    """All metrics.json files under results_dir, in sorted path order."""
+    found = []
+    stack = [str(results_dir)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name == "metrics.json":
+                    found.append(Path(entry.path))
+    found.sort()
+    return found
+
+
+def _read_metrics(path: Path) -> tuple[dict | None, str | None]:
+    """Read one metrics.json. Returns (data, None), or (None, timestamp) for a
+    single-task rate-limited run recognized without parsing it."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if not _SEQUENCE_RE.search(raw) and all(
+            raw.count(key) == 1 and p.search(raw) for key, p in _RATE_LIMITED_PEEKS):
+        m = _TIMESTAMP_RE.search(raw)
+        if m is not None and raw.count(_TIMESTAMP_KEY) == 1:
+            return None, m.group(1).decode()
+    return _loads(raw), None
+
+
+def load_all_results(results_dir: Path, since: str = "") -> tuple[list[dict], list[dict], int]:
+    """Load single-task and sequence metrics.json files in one walk.
 
     Searches recursively so results in subdirectories (e.g. old/) are included.
-    Rate-limited runs (zero tokens, zero cost) are excluded.
+    Rate-limited single-task runs (zero tokens, zero cost) are excluded.
     If *since* is set, only results with timestamp >= since are included.
 
-    Returns (results, num_rate_limited).
+    Returns (results, seq_results, num_rate_limited).
     """
     results = []
+    seq_results = []
     rate_limited = 0
-    for metrics_file in sorted(results_dir.glob("**/metrics.json")):
-        with open(metrics_file) as f:
-            data = json.load(f)
-        if data.get("type") == "sequence":
+    # Reading and decoding is independent per file; filtering stays
+    # sequential and in path order.
+    with ThreadPoolExecutor() as pool:
+        loaded = list(pool.map(_read_metrics, _find_metrics_files(results_dir)))
+    for data, rate_limited_ts in loaded:
+        if data is None:
+            if not (since and rate_limited_ts < since):
+                rate_limited += 1
             continue
         if since and data.get("timestamp", "") < since:
             continue
-        if _is_rate_limited(data):
+        _intern_keys(data)
+        if data.get("type") == "sequence":
+            seq_results.append(data)
+        elif _is_rate_limited(data):
             rate_limited += 1
-            continue
-        results.append(data)
-    return results, rate_limited
+        else:
+            results.append(data)
+    return results, seq_results, rate_limited
 
 
-def load_sequence_results(results_dir: Path, since: str = "") -> list[dict]:
-    """Load sequence-type metrics.json files from results directory.
+# Grouping keys shared by many runs; interned so every run holds the same
+# string object and the per-table dict probes compare by identity.
+_GROUP_FIELDS = ("task", "treatment", "sequence")
 
-    Searches recursively so results in subdirectories are included.
-    If *since* is set, only results with timestamp >= since are included.
+
+def _intern_keys(data: dict):
+    for field in _GROUP_FIELDS:
+        value = data.get(field)
+        if type(value) is str:
+            data[field] = sys.intern(value)
+
+
+def load_results(results_dir: Path, since: str = "") -> tuple[list[dict], int]:
+    """Load single-task metrics.json files (see load_all_results).
+
+    Returns (results, num_rate_limited).
     """
-    results = []
-    for metrics_file in sorted(results_dir.glob("**/metrics.json")):
-        with open(metrics_file) as f:
-            data = json.load(f)
-        if data.get("type") == "sequence":
-            if since and data.get("timestamp", "") < since:
-                continue
-            results.append(data)
-    return results
+    results, _, rate_limited = load_all_results(results_dir, since)
+    return results, rate_limited
+
+
+def load_sequence_results(results_dir: Path, since: str = "") -> list[dict]:
+    """Load sequence-type metrics.json files (see load_all_results)."""
+    return load_all_results(results_dir, since)[1]
 
 
+# Token counts and costs repeat across tables and rows; typed so that 1
+# and 1.0 (str() differs) do not share an entry.
+@lru_cache(maxsize=4096, typed=True)
 def fmt_tokens(n: int) -> str:
     if n >= 1000:
         return f"{n / 1000:.0f}k"
@@ -254,6 +368,7 @@ def fmt_bool(b: bool) -> str:
     return "YES" if b else "NO"
 
 
+@lru_cache(maxsize=4096)
 def fmt_cost(c: float) -> str:
     return f"${c:.2f}"
 
@@ -272,10 +387,10 @@ def fmt_pct(n: int, total: int) -> str:
 
 def _baseline_pass_rate(results: list[dict]) -> float | None:
     """Get baseline treatment pass rate, or None if no baseline runs exist."""
-    bl_runs = [r for r in results if r.get("treatment") == "baseline"]
-    if not bl_runs:
+    bl = _group_totals(results).get("baseline")
+    if bl is None:
         return None
-    return sum(1 for r in bl_runs if r.get("acceptance_pass")) / len(bl_runs) * 100
+    return bl["passed"] / bl["n"] * 100
 
 
 def fmt_pass_delta(rate: float, baseline: float | None) -> str:
@@ -290,22 +405,33 @@ def fmt_pass_delta(rate: float, baseline: float | None) -> str:
     return "0pp"
 
 
-def md_table(headers: list[str], rows: list[list[str]], aligns: list[str] | None = None):
-    """Print a markdown table. aligns: 'l', 'r', or 'c' per column."""
+_ALIGN_SEPARATORS = {"l": "---", "r": "---:", "c": ":---:"}
+
+
+@lru_cache(maxsize=64)
+def _table_head(headers: tuple[str, ...], aligns: tuple[str, ...]) -> str:
+    """Header and separator rows of a markdown table, built once per layout."""
     if not aligns:
-        aligns = ["l"] * len(headers)
-    sep_cells = []
-    for a in aligns:
-        if a == "r":
-            sep_cells.append("---:")
-        elif a == "c":
-            sep_cells.append(":---:")
-        else:
-            sep_cells.append("---")
-    print("| " + " | ".join(headers) + " |")
-    print("| " + " | ".join(sep_cells) + " |")
-    for row in rows:
-        print("| " + " | ".join(row) + " |")
+        aligns = ("l",) * len(headers)
+    sep_cells = [_ALIGN_SEPARATORS.get(a, "---") for a in aligns]
+    return "| " + " | ".join(headers) + " |\n| " + " | ".join(sep_cells) + " |"
+
+
+def md_table(headers: list[str], rows: list[list[str]], aligns: list[str] | None = None):
+    """Print a markdown table. aligns: 'l', 'r', or 'c' per column.
+
+    The table is assembled first and written with a single write() call.
+    """
+    md_table_lines(headers, ["| " + " | ".join(row) + " |" for row in rows], aligns)
+
+
+def md_table_lines(headers: list[str], lines: list[str], aligns: list[str] | None = None):
+    """Print a markdown table whose body rows are already rendered lines.
+
+    For long per-run tables, which format each row with one _ROW template
+    instead of building a list of cells first.
+    """
+    sys.stdout.write("\n".join([_table_head(tuple(headers), tuple(aligns or ())), *lines]) + "\n")
 
 
 def _bucket_stats(runs: list[dict]) -> tuple[int, str, str, str, str, str]:
@@ -313,55 +439,216 @@ def _bucket_stats(runs: list[dict]) -> tuple[int, str, str, str, str, str]:
     n = len(runs)
     if n == 0:
         return (0, "-", "-", "-", "-", "-")
-    pass_rate = sum(1 for r in runs if r.get("acceptance_pass")) / n * 100
-    avg_tokens = sum(r.get("tokens_total", 0) for r in runs) / n
-    avg_cost = sum(r.get("budget_used_usd", 0) for r in runs) / n
-    avg_turns = sum(r.get("api_turns", 0) for r in runs) / n
-    tamper_pct = sum(1 for r in runs if r.get("regression_tests_modified")) / n * 100
+    passed = tokens = cost = turns = tampered = 0
+    for r in runs:
+        if r.get("acceptance_pass"):
+            passed += 1
+        tokens += r.get("tokens_total", 0)
+        cost += r.get("budget_used_usd", 0)
+        turns += r.get("api_turns", 0)
+        if r.get("regression_tests_modified"):
+            tampered += 1
+    return _totals_stats({"n": n, "passed": passed, "tokens_total": tokens,
+                          "budget_used_usd": cost, "api_turns": turns, "tampered": tampered})
+
+
+def _totals_stats(t: dict) -> tuple[int, str, str, str, str, str]:
+    """_bucket_stats for one group of _group_totals (n must be non-zero)."""
+    n = t["n"]
     return (
         n,
-        f"{pass_rate:.0f}%",
-        fmt_tokens(int(avg_tokens)),
-        fmt_cost(avg_cost),
-        f"{avg_turns:.1f}",
-        f"{tamper_pct:.0f}%",
+        f"{t['passed'] / n * 100:.0f}%",
+        fmt_tokens(int(t["tokens_total"] / n)),
+        fmt_cost(t["budget_used_usd"] / n),
+        f"{t['api_turns'] / n:.1f}",
+        f"{t['tampered'] / n * 100:.0f}%",
     )
 
 
+# Per-run 0/1 flags summed by _group_totals next to the numeric fields.
+_FLAG_COLUMNS = {
+    "passed": lambda r: r.get("acceptance_pass"),
+    "skipped": lambda r: r.get("regression_skipped", 0) > 0,
+    "tampered": lambda r: r.get("regression_tests_modified"),
+    "succeeded": lambda r: r.get("acceptance_pass") and r.get("regression_pass"),
+}
+
+
+class _Columns(dict):
+    """field -> [value per run] over one results list, built on first use.
+
+    Numeric fields read missing/None as 0; _FLAG_COLUMNS names read 0/1.
+    Each column is its own list comprehension over the runs: reading
+    several fields in one pass (itemgetter + zip) measured slower.
+    """
+
+    def __init__(self, results: list[dict]):
+        super().__init__()
+        self.results = results
+
+    def __missing__(self, field: str) -> list:
+        flag = _FLAG_COLUMNS.get(field)
+        if flag is not None:
+            col = [1 if flag(r) else 0 for r in self.results]
+        else:
+            col = [r.get(field, 0) or 0 for r in self.results]
+        self[field] = col
+        return col
+
+
+class _GroupTotals(dict):
+    """One group of _group_totals: "n" up front, every other sum on first use."""
+
+    def __init__(self, columns: _Columns, rows: list[int]):
+        super().__init__(n=len(rows))
+        self.columns = columns
+        self.rows = rows
+        # Gathers the group's values out of a column in one C call;
+        # itemgetter needs two or more indices to return a tuple.
+        if len(rows) > 1:
+            self.pick = itemgetter(*rows)
+        else:
+            self.pick = lambda col: [col[i] for i in rows]
+
+    def __missing__(self, field: str):
+        if field == "error_types":
+            value = Counter()
+            results = self.columns.results
+            for i in self.rows:
+                value.update(results[i].get("tool_error_types", {}))
+        elif field == "treatments":
+            value = len(set(self.pick(self.columns["treatment"])))
+        else:
+            value = sum(self.pick(self.columns[field]))
+        self[field] = value
+        return value
+
+
+# Memo of the last results list's columns, and of the last (results list,
+# totals) per key. Tables that share a results list share the column
+# lists and, per key, the group sums; nothing is read until a table asks.
+_columns_memo: dict = {}
+_totals_memo: dict = {}
+
+
+def _columns(results: list[dict]) -> _Columns:
+    if _columns_memo.get("results") is not results:
+        _columns_memo.update(results=results, columns=_Columns(results))
+    return _columns_memo["columns"]
+
+
+def _group_totals(results: list[dict], key="treatment") -> dict[str, dict]:
+    """Group runs by *key* (a field name, or a function of the run) and
+    tally counts and field sums.
+
+    Each group maps to a dict with "n" plus, on access, the sum of any run
+    field or _FLAG_COLUMNS flag ("passed", "skipped", "tampered",
+    "succeeded"), an "error_types" Counter and the number of distinct
+    "treatments"; groups appear in first-seen order. Fields are read out
+    of the run dicts once into shared column lists, and each group's sums
+    are taken over its row indices into those columns.
+    """
+    memo = _totals_memo.get(key)
+    if memo is not None and memo[0] is results:
+        return memo[1]
+
+    group_of = key if callable(key) else itemgetter(key)
+    rows_by_group: dict[str, list[int]] = {}
+    for i, r in enumerate(results):
+        rows_by_group.setdefault(group_of(r), []).append(i)
+
+    columns = _columns(results)
+    totals = {group: _GroupTotals(columns, rows) for group, rows in rows_by_group.items()}
+
+    _totals_memo[key] = (results, totals)
+    return totals
+
+
+_flags_memo: dict = {}
+
+
+def _report_flags(results: list[dict]) -> dict:
+    """Which optional tables have data, from one pass over *results*.
+
+    {"any_hooks", "any_mcp", "any_agents", "hook_variants"}, where
+    hook_variants is the number of distinct variants among hooked runs.
+    Memoized on the last results list.
+    """
+    if _flags_memo.get("results") is results:
+        return _flags_memo["flags"]
+    any_hooks = any_mcp = any_agents = False
+    variants = set()
+    for r in results:
+        c = _classification(r)
+        if c["hook_begins"] > 0:
+            any_hooks = True
+            variants.add(c["hook_variant"])
+        if c["mcp_total"] > 0:
+            any_mcp = True
+        if c["has_agents"]:
+            any_agents = True
+    flags = {"any_hooks": any_hooks, "any_mcp": any_mcp, "any_agents": any_agents,
+             "hook_variants": len(variants)}
+    _flags_memo.update(results=results, flags=flags)
+    return flags
+
+
+_treatment_of = itemgetter("treatment")
+_task_treatment_key = itemgetter("task", "treatment")
+
+
+def _by_treatment_sorted(runs: list[dict]) -> list[tuple[str, list[dict]]]:
+    """(treatment, runs) pairs in treatment order, from one stable sort."""
+    return [(t, list(g)) for t, g in groupby(sorted(runs, key=_treatment_of), key=_treatment_of)]
+
+
 # ============================================================
 # EXISTING TABLES (enhanced)
 # ============================================================
 
+_DETAIL_HEADERS = (
+    "Task", "Treatment", "Pass", "R.Dlt", "Blks",
+    "BDD", "MCP", "Inj", "Facets",
+    "Tokens", "Turns", "Time", "Cost",
+)
+_DETAIL_ALIGNS = ("l", "l", "r", "r", "r", "c", "r", "r", "r", "r", "r", "r", "r")
+_DETAIL_ROW = "| {} | {} | {} | {} | {} | {} | {} | {} | {} | {} | {} | {}s | {} |"
+
+
 def print_detail_table(results: list[dict]):
     """Print detailed per-run results table with BDD engagement columns."""
     if not results:
         print("No results found.")
         return
 
-    headers = [
-        "Task", "Treatment", "Pass", "R.Dlt", "Blks",
-        "BDD", "MCP", "Inj", "Facets",
-        "Tokens", "Turns", "Time", "Cost",
-    ]
-    aligns = ["l", "l", "r", "r", "r", "c", "r", "r", "r", "r", "r", "r", "r"]
-    rows = []
-    for r in results:
-        rows.append([
+    row = _DETAIL_ROW.format
+    # Formatted columns, one map() per formatter rather than a call per cell
+    passes = map(fmt_bool, map(itemgetter("acceptance_pass"), results))
+    tokens = map(fmt_tokens, map(itemgetter("tokens_total"), results))
+    costs = map(fmt_cost, map(itemgetter("budget_used_usd"), results))
+    lines = []
+    for r, passed, tok, cost in zip(results, passes, tokens, costs):
+        get = r.get
+        lines.append(row(
             r["task"],
             r["treatment"],
-            fmt_bool(r["acceptance_pass"]),
-            fmt_delta(r.get("regression_delta", 0)),
-            str(r.get("stop_blocks", 0)),
-            engagement_tag(r),
-            str(r.get("mcp_tool_calls", 0)),
-            str(r.get("hook_injections", 0)),
-            str(r.get("hook_unique_facets", 0)),
-            fmt_tokens(r["tokens_total"]),
-            str(r["api_turns"]),
-            f"{r['wall_time_seconds']}s",
-            fmt_cost(r["budget_used_usd"]),
-        ])
-    md_table(headers, rows, aligns)
+            passed,
+            fmt_delta(get("regression_delta", 0)),
+            get("stop_blocks", 0),
+            get("_engagement_tag") or engagement_tag(r),
+            get("mcp_tool_calls", 0),
+            get("hook_injections", 0),
+            get("hook_unique_facets", 0),
+            tok,
+            r["api_turns"],
+            r["wall_time_seconds"],
+            cost,
+        ))
+    md_table_lines(_DETAIL_HEADERS, lines, _DETAIL_ALIGNS)
+
+
+_SUMMARY_HEADERS = ("Treatment", "Runs", "Pass%", "vs BL", "Avg Blks", "Skip%", "Tamper%", "Avg Tokens", "Avg Turns", "Avg Time", "Avg Cost")
+_SUMMARY_ALIGNS = ("l", "r", "r", "r", "r", "r", "r", "r", "r", "r", "r")
 
 
 def print_summary_table(results: list[dict]):
@@ -369,28 +656,24 @@ def print_summary_table(results: list[dict]):
     if not results:
         return
 
-    by_treatment = defaultdict(list)
-    for r in results:
-        by_treatment[r["treatment"]].append(r)
+    totals = _group_totals(results)
 
     print()
     print("### Summary by Treatment")
     print()
     bl_rate = _baseline_pass_rate(results)
-    headers = ["Treatment", "Runs", "Pass%", "vs BL", "Avg Blks", "Skip%", "Tamper%", "Avg Tokens", "Avg Turns", "Avg Time", "Avg Cost"]
-    aligns = ["l", "r", "r", "r", "r", "r", "r", "r", "r", "r", "r"]
     rows = []
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        n = len(runs)
-        pass_rate = sum(1 for r in runs if r["acceptance_pass"]) / n * 100
-        avg_blks = sum(r.get("stop_blocks", 0) for r in runs) / n
-        skip_pct = sum(1 for r in runs if r.get("regression_skipped", 0) > 0) / n * 100
-        tamper_pct = sum(1 for r in runs if r.get("regression_tests_modified")) / n * 100
-        avg_tokens = sum(r["tokens_total"] for r in runs) / n
-        avg_turns = sum(r["api_turns"] for r in runs) / n
-        avg_time = sum(r["wall_time_seconds"] for r in runs) / n
-        avg_cost = sum(r["budget_used_usd"] for r in runs) / n
+    for treatment in sorted(totals):
+        t = totals[treatment]
+        n = t["n"]
+        pass_rate = t["passed"] / n * 100
+        avg_blks = t["stop_blocks"] / n
+        skip_pct = t["skipped"] / n * 100
+        tamper_pct = t["tampered"] / n * 100
+        avg_tokens = t["tokens_total"] / n
+        avg_turns = t["api_turns"] / n
+        avg_time = t["wall_time_seconds"] / n
+        avg_cost = t["budget_used_usd"] / n
 
         rows.append([
             treatment,
@@ -405,7 +688,11 @@ def print_summary_table(results: list[dict]):
             f"{avg_time:.0f}s",
             fmt_cost(avg_cost),
         ])
-    md_table(headers, rows, aligns)
+    md_table(_SUMMARY_HEADERS, rows, _SUMMARY_ALIGNS)
+
+
+_TASK_SUMMARY_HEADERS = ("Task", "Runs", "Pass%", "Avg Tokens", "Avg Turns", "Avg Cost")
+_TASK_SUMMARY_ALIGNS = ("l", "r", "r", "r", "r", "r")
 
 
 def print_task_summary(results: list[dict]):
@@ -413,23 +700,19 @@ def print_task_summary(results: list[dict]):
     if not results:
         return
 
-    by_task = defaultdict(list)
-    for r in results:
-        by_task[r["task"]].append(r)
+    totals = _group_totals(results, "task")
 
     print()
     print("### Summary by Task")
     print()
-    headers = ["Task", "Runs", "Pass%", "Avg Tokens", "Avg Turns", "Avg Cost"]
-    aligns = ["l", "r", "r", "r", "r", "r"]
     rows = []
-    for task in sorted(by_task.keys()):
-        runs = by_task[task]
-        n = len(runs)
-        pass_rate = sum(1 for r in runs if r["acceptance_pass"]) / n * 100
-        avg_tokens = sum(r["tokens_total"] for r in runs) / n
-        avg_turns = sum(r["api_turns"] for r in runs) / n
-        avg_cost = sum(r["budget_used_usd"] for r in runs) / n
+    for task in sorted(totals):
+        t = totals[task]
+        n = t["n"]
+        pass_rate = t["passed"] / n * 100
+        avg_tokens = t["tokens_total"] / n
+        avg_turns = t["api_turns"] / n
+        avg_cost = t["budget_used_usd"] / n
 
         rows.append([
             task,
@@ -439,7 +722,11 @@ def print_task_summary(results: list[dict]):
             f"{avg_turns:.1f}",
             fmt_cost(avg_cost),
         ])
-    md_table(headers, rows, aligns)
+    md_table(_TASK_SUMMARY_HEADERS, rows, _TASK_SUMMARY_ALIGNS)
+
+
+_EFFICIENCY_HEADERS = ("Treatment", "Successes", "Tokens/Success", "Cost/Success", "Turns/Success")
+_EFFICIENCY_ALIGNS = ("l", "r", "r", "r", "r")
 
 
 def print_efficiency_table(results: list[dict]):
@@ -447,27 +734,28 @@ def print_efficiency_table(results: list[dict]):
     if not results:
         return
 
-    by_treatment = defaultdict(list)
+    # treatment -> [successes, tokens, cost, turns] over successful runs
+    acc: dict[str, list] = {}
     for r in results:
-        by_treatment[r["treatment"]].append(r)
+        a = acc.setdefault(r["treatment"], [0, 0, 0, 0])
+        if r["acceptance_pass"] and r["regression_pass"]:
+            a[0] += 1
+            a[1] += r["tokens_total"]
+            a[2] += r["budget_used_usd"]
+            a[3] += r["api_turns"]
 
     print()
     print("### Efficiency (successful runs only)")
     print()
-    headers = ["Treatment", "Successes", "Tokens/Success", "Cost/Success", "Turns/Success"]
-    aligns = ["l", "r", "r", "r", "r"]
     rows = []
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        successes = [r for r in runs if r["acceptance_pass"] and r["regression_pass"]]
-        n = len(successes)
+    for treatment, (n, tokens, cost, turns) in sorted(acc.items()):
         if n == 0:
             rows.append([treatment, "0", "N/A", "N/A", "N/A"])
             continue
 
-        avg_tokens = sum(r["tokens_total"] for r in successes) / n
-        avg_cost = sum(r["budget_used_usd"] for r in successes) / n
-        avg_turns = sum(r["api_turns"] for r in successes) / n
+        avg_tokens = tokens / n
+        avg_cost = cost / n
+        avg_turns = turns / n
 
         rows.append([
             treatment,
@@ -476,7 +764,11 @@ def print_efficiency_table(results: list[dict]):
             fmt_cost(avg_cost),
             f"{avg_turns:.1f}",
         ])
-    md_table(headers, rows, aligns)
+    md_table(_EFFICIENCY_HEADERS, rows, _EFFICIENCY_ALIGNS)
+
+
+_INTEGRITY_HEADERS = ("Treatment", "Runs", "Avg R.Delta", "Skip%", "Tamper%", "Avg Blks")
+_INTEGRITY_ALIGNS = ("l", "r", "r", "r", "r", "r")
 
 
 def print_integrity_table(results: list[dict]):
@@ -484,23 +776,19 @@ def print_integrity_table(results: list[dict]):
     if not results:
         return
 
-    by_treatment = defaultdict(list)
-    for r in results:
-        by_treatment[r["treatment"]].append(r)
+    totals = _group_totals(results)
 
     print()
     print("### Test Integrity")
     print()
-    headers = ["Treatment", "Runs", "Avg R.Delta", "Skip%", "Tamper%", "Avg Blks"]
-    aligns = ["l", "r", "r", "r", "r", "r"]
     rows = []
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        n = len(runs)
-        avg_delta = sum(r.get("regression_delta", 0) for r in runs) / n
-        skip_pct = sum(1 for r in runs if r.get("regression_skipped", 0) > 0) / n * 100
-        tamper_pct = sum(1 for r in runs if r.get("regression_tests_modified")) / n * 100
-        avg_blks = sum(r.get("stop_blocks", 0) for r in runs) / n
+    for treatment in sorted(totals):
+        t = totals[treatment]
+        n = t["n"]
+        avg_delta = t["regression_delta"] / n
+        skip_pct = t["skipped"] / n * 100
+        tamper_pct = t["tampered"] / n * 100
+        avg_blks = t["stop_blocks"] / n
 
         rows.append([
             treatment,
@@ -510,7 +798,26 @@ def print_integrity_table(results: list[dict]):
             f"{tamper_pct:.0f}%",
             f"{avg_blks:.1f}",
         ])
-    md_table(headers, rows, aligns)
+    md_table(_INTEGRITY_HEADERS, rows, _INTEGRITY_ALIGNS)
+
+
+# Per-run averages shown after Pass%/vs BL, in column order.
+_ENGAGEMENT_AVG_FIELDS = (
+    "_quality_score", "mcp_tool_calls", "bdd_test_calls", "hook_begins",
+    "hook_injections", "hook_failures", "hook_unique_facets", "edit_log_entries",
+)
+# (tool name, per-run call count field) for each bdd MCP tool.
+_MCP_TOOLS = (
+    ("bdd_test", "bdd_test_calls"),
+    ("bdd_motivation", "bdd_motivation_calls"),
+    ("bdd_locate", "bdd_locate_calls"),
+    ("bdd_status", "bdd_status_calls"),
+)
+_MCP_AVG_FIELDS = tuple(field for _, field in _MCP_TOOLS) + ("mcp_tool_calls",)
+
+
+_ENGAGEMENT_HEADERS = ("Treatment", "Runs", "Pass%", "vs BL", "Avg Quality", "MCP Calls", "bdd_test", "Hooks", "Injected", "Failed", "Uniq Facets", "Edits")
+_ENGAGEMENT_ALIGNS = ("l", "r", "r", "r", "r", "r", "r", "r", "r", "r", "r", "r")
 
 
 def print_engagement_table(results: list[dict]):
@@ -518,45 +825,29 @@ def print_engagement_table(results: list[dict]):
     if not results:
         return
 
-    by_treatment = defaultdict(list)
-    for r in results:
-        by_treatment[r["treatment"]].append(r)
+    totals = _group_totals(results)
 
     print()
     print("### BDD Engagement by Treatment")
     print()
     bl_rate = _baseline_pass_rate(results)
-    headers = ["Treatment", "Runs", "Pass%", "vs BL", "Avg Quality", "MCP Calls", "bdd_test", "Hooks", "Injected", "Failed", "Uniq Facets", "Edits"]
-    aligns = ["l", "r", "r", "r", "r", "r", "r", "r", "r", "r", "r", "r"]
     rows = []
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        n = len(runs)
-        pass_rate = sum(1 for r in runs if r.get("acceptance_pass")) / n * 100
-        avg_quality = sum(r.get("_quality_score", 0) or 0 for r in runs) / n
-        avg_mcp = sum(r.get("mcp_tool_calls", 0) for r in runs) / n
-        avg_test = sum(r.get("bdd_test_calls", 0) for r in runs) / n
-        avg_hooks = sum(r.get("hook_begins", 0) for r in runs) / n
-        avg_inj = sum(r.get("hook_injections", 0) for r in runs) / n
-        avg_fail = sum(r.get("hook_failures", 0) for r in runs) / n
-        avg_facets = sum(r.get("hook_unique_facets", 0) for r in runs) / n
-        avg_edits = sum(r.get("edit_log_entries", 0) for r in runs) / n
-
+    for treatment in sorted(totals):
+        t = totals[treatment]
+        n = t["n"]
+        pass_rate = t["passed"] / n * 100
         rows.append([
             treatment,
             str(n),
             f"{pass_rate:.0f}%",
             fmt_pass_delta(pass_rate, bl_rate),
-            f"{avg_quality:.1f}",
-            f"{avg_mcp:.1f}",
-            f"{avg_test:.1f}",
-            f"{avg_hooks:.1f}",
-            f"{avg_inj:.1f}",
-            f"{avg_fail:.1f}",
-            f"{avg_facets:.1f}",
-            f"{avg_edits:.1f}",
+            *(f"{t[field] / n:.1f}" for field in _ENGAGEMENT_AVG_FIELDS),
         ])
-    md_table(headers, rows, aligns)
+    md_table(_ENGAGEMENT_HEADERS, rows, _ENGAGEMENT_ALIGNS)
+
+
+_RELIABILITY_HEADERS = ("Treatment", "Runs", "Tool Errs", "Hook Starts", "Hook Fails", "Fail%", "Top Error")
+_RELIABILITY_ALIGNS = ("l", "r", "r", "r", "r", "r", "l")
 
 
 def print_reliability_table(results: list[dict]):
@@ -564,32 +855,25 @@ def print_reliability_table(results: list[dict]):
     if not results:
         return
 
-    by_treatment = defaultdict(list)
-    for r in results:
-        by_treatment[r["treatment"]].append(r)
+    totals = _group_totals(results)
 
     print()
     print("### Tool & Hook Reliability by Treatment")
     print()
-    headers = ["Treatment", "Runs", "Tool Errs", "Hook Starts", "Hook Fails", "Fail%", "Top Error"]
-    aligns = ["l", "r", "r", "r", "r", "r", "l"]
     rows = []
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        n = len(runs)
-        avg_errs = sum(r.get("tool_errors", 0) for r in runs) / n
-        avg_starts = sum(r.get("hook_begins", 0) for r in runs) / n
-        avg_fails = sum(r.get("hook_failures", 0) for r in runs) / n
-        total_starts = sum(r.get("hook_begins", 0) for r in runs)
-        total_fails = sum(r.get("hook_failures", 0) for r in runs)
+    for treatment in sorted(totals):
+        t = totals[treatment]
+        n = t["n"]
+        total_starts = t["hook_begins"]
+        total_fails = t["hook_failures"]
+        avg_errs = t["tool_errors"] / n
+        avg_starts = total_starts / n
+        avg_fails = total_fails / n
         fail_pct = f"{total_fails / total_starts * 100:.0f}%" if total_starts > 0 else "-"
 
-        # Find most common error type across runs
-        error_counts: dict[str, int] = defaultdict(int)
-        for r in runs:
-            for msg, cnt in r.get("tool_error_types", {}).items():
-                error_counts[msg] += cnt
-        top_error = max(error_counts, key=error_counts.get) if error_counts else "-"
+        # Most common error type across runs
+        error_counts = t["error_types"]
+        top_error = error_counts.most_common(1)[0][0] if error_counts else "-"
         if len(top_error) > 40:
             top_error = top_error[:37] + "..."
 
@@ -602,40 +886,38 @@ def print_reliability_table(results: list[dict]):
             fail_pct,
             top_error,
         ])
-    md_table(headers, rows, aligns)
+    md_table(_RELIABILITY_HEADERS, rows, _RELIABILITY_ALIGNS)
 
 
 # ============================================================
 # NEW BDD ANALYSIS TABLES
 # ============================================================
 
+_TREATMENT_FEATURES_HEADERS = ("Treatment", "Hooks", "MCP", "Agents", "Skills", "Hook Variant", "Engagement")
+_TREATMENT_FEATURES_ALIGNS = ("l", "c", "c", "c", "c", "l", "l")
+
+
 def print_treatment_features(results: list[dict]):
     """Print feature matrix: which BDD mechanisms each treatment uses."""
     if not results:
         return
 
-    by_treatment = defaultdict(list)
-    for r in results:
-        by_treatment[r["treatment"]].append(r)
-
     print()
     print("### Treatment Feature Matrix")
     print()
-    headers = ["Treatment", "Hooks", "MCP", "Agents", "Skills", "Hook Variant", "Engagement"]
-    aligns = ["l", "c", "c", "c", "c", "l", "l"]
     rows = []
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        classifications = [classify_run(r) for r in runs]
+    variant_of = HOOK_VARIANTS.get
+    for treatment, runs in _by_treatment_sorted(results):
         # Aggregate: if ANY run has the feature, mark it
-        any_hooks = any(c["has_hooks"] for c in classifications)
-        any_mcp = any(c["has_mcp"] for c in classifications)
-        any_agents = any(c["has_agents"] for c in classifications)
-        any_skills = any(c["has_skills"] for c in classifications)
-
-        # Pick the most-informed run for variant/engagement (prefer runs with BDD data)
-        best = max(classifications, key=lambda c: c["context_volume"] + c["hook_begins"])
-        # Override engagement based on aggregated feature presence
+        any_hooks = any_mcp = any_agents = any_skills = False
+        for r in runs:
+            c = _classification(r)
+            any_hooks = any_hooks or c["has_hooks"]
+            any_mcp = any_mcp or c["has_mcp"]
+            any_agents = any_agents or c["has_agents"]
+            any_skills = any_skills or c["has_skills"]
+
+        # Engagement from aggregated feature presence
         if any_agents and any_mcp and any_hooks:
             eng = "Agent+MCP+Hooks"
         elif any_agents and any_mcp:
@@ -654,7 +936,7 @@ def print_treatment_features(results: list[dict]):
             eng = "No BDD"
 
         # Hook variant from treatment name (deterministic, not data-dependent)
-        variant = HOOK_VARIANTS.get(treatment, "standard" if any_hooks else "none")
+        variant = variant_of(treatment, "standard" if any_hooks else "none")
 
         rows.append([
             treatment,
@@ -665,7 +947,11 @@ def print_treatment_features(results: list[dict]):
             variant,
             eng,
         ])
-    md_table(headers, rows, aligns)
+    md_table(_TREATMENT_FEATURES_HEADERS, rows, _TREATMENT_FEATURES_ALIGNS)
+
+
+_ENGAGEMENT_VS_OUTCOMES_HEADERS = ("Engagement Level", "Runs", "Pass%", "Tamper%", "Avg Tokens", "Avg Turns", "Avg Cost")
+_ENGAGEMENT_VS_OUTCOMES_ALIGNS = ("l", "r", "r", "r", "r", "r", "r")
 
 
 def print_engagement_vs_outcomes(results: list[dict]):
@@ -677,10 +963,7 @@ def print_engagement_vs_outcomes(results: list[dict]):
     if not results:
         return
 
-    buckets: dict[str, list[dict]] = defaultdict(list)
-    for r in results:
-        c = classify_run(r)
-        buckets[c["engagement"]].append(r)
+    buckets = _group_totals(results, _engagement_key)
 
     # Ordered display (show non-empty buckets in logical order)
     order = [
@@ -691,24 +974,54 @@ def print_engagement_vs_outcomes(results: list[dict]):
     print()
     print("### BDD Engagement Level vs Outcomes")
     print()
-    headers = ["Engagement Level", "Runs", "Pass%", "Tamper%", "Avg Tokens", "Avg Turns", "Avg Cost"]
-    aligns = ["l", "r", "r", "r", "r", "r", "r"]
     rows = []
     for label in order:
-        runs = buckets.get(label, [])
-        n, pass_pct, avg_tok, avg_cost, avg_turns, tamper_pct = _bucket_stats(runs)
-        if n == 0:
+        if label not in buckets:
             continue
+        n, pass_pct, avg_tok, avg_cost, avg_turns, tamper_pct = _totals_stats(buckets[label])
         rows.append([label, str(n), pass_pct, tamper_pct, avg_tok, avg_turns, avg_cost])
 
     # Catch any engagement levels not in our order list
     for label in sorted(buckets.keys()):
         if label not in order:
-            runs = buckets[label]
-            n, pass_pct, avg_tok, avg_cost, avg_turns, tamper_pct = _bucket_stats(runs)
+            n, pass_pct, avg_tok, avg_cost, avg_turns, tamper_pct = _totals_stats(buckets[label])
             rows.append([label, str(n), pass_pct, tamper_pct, avg_tok, avg_turns, avg_cost])
 
-    md_table(headers, rows, aligns)
+    md_table(_ENGAGEMENT_VS_OUTCOMES_HEADERS, rows, _ENGAGEMENT_VS_OUTCOMES_ALIGNS)
+
+
+# Bucket labels and the inclusive upper bound of every bucket but the
+# last; bisect_left(bounds, value) is the value's bucket index.
+_VOLUME_LABELS = ("0 (none)", "1-3 (light)", "4-7 (moderate)", "8-12 (heavy)", "13+ (saturated)")
+_VOLUME_BOUNDS = (0, 3, 7, 12)
+_FACET_LABELS = ("0 facets", "1-5 facets", "6-10 facets", "11+ facets")
+_FACET_BOUNDS = (0, 5, 10)
+
+
+def _engagement_key(r: dict) -> str:
+    return _classification(r)["engagement"]
+
+
+def _volume_key(r: dict) -> str:
+    return _VOLUME_LABELS[bisect_left(_VOLUME_BOUNDS, _classification(r)["context_volume"])]
+
+
+def _agents_key(r: dict) -> bool:
+    return _classification(r)["has_agents"]
+
+
+def _tier_key(r: dict) -> str:
+    return _classification(r)["tier"]
+
+
+def _facet_key(r: dict) -> str:
+    return _FACET_LABELS[bisect_left(_FACET_BOUNDS, r.get("hook_unique_facets", 0))]
+
+
+_CONTEXT_VOLUME_HEADERS = ("Context Volume", "Runs", "Pass%", "Tamper%", "Avg Tokens", "Avg Cost")
+_CONTEXT_VOLUME_ALIGNS = ("l", "r", "r", "r", "r", "r")
+_FACET_COVERAGE_HEADERS = ("Facet Coverage", "Runs", "Pass%", "Tamper%", "Avg Tokens", "Avg Cost")
+_FACET_COVERAGE_ALIGNS = ("l", "r", "r", "r", "r", "r")
 
 
 def print_context_volume_analysis(results: list[dict]):
@@ -721,85 +1034,52 @@ def print_context_volume_analysis(results: list[dict]):
         return
 
     # --- Context volume (injections + MCP calls) ---
-    volume_buckets: dict[str, list[dict]] = {
-        "0 (none)": [],
-        "1-3 (light)": [],
-        "4-7 (moderate)": [],
-        "8-12 (heavy)": [],
-        "13+ (saturated)": [],
-    }
-
-    for r in results:
-        vol = classify_run(r)["context_volume"]
-        if vol == 0:
-            volume_buckets["0 (none)"].append(r)
-        elif vol <= 3:
-            volume_buckets["1-3 (light)"].append(r)
-        elif vol <= 7:
-            volume_buckets["4-7 (moderate)"].append(r)
-        elif vol <= 12:
-            volume_buckets["8-12 (heavy)"].append(r)
-        else:
-            volume_buckets["13+ (saturated)"].append(r)
+    volume_buckets = _group_totals(results, _volume_key)
 
     print()
     print("### Context Volume vs Outcomes")
     print()
     print("Context volume = hook injections + MCP tool calls")
     print()
-    headers = ["Context Volume", "Runs", "Pass%", "Tamper%", "Avg Tokens", "Avg Cost"]
-    aligns = ["l", "r", "r", "r", "r", "r"]
     rows = []
-    for label in volume_buckets:
-        runs = volume_buckets[label]
-        n, pass_pct, avg_tok, avg_cost, _, tamper_pct = _bucket_stats(runs)
-        if n == 0:
+    for label in _VOLUME_LABELS:
+        if label not in volume_buckets:
             continue
+        n, pass_pct, avg_tok, avg_cost, _, tamper_pct = _totals_stats(volume_buckets[label])
         rows.append([label, str(n), pass_pct, tamper_pct, avg_tok, avg_cost])
-    md_table(headers, rows, aligns)
+    md_table(_CONTEXT_VOLUME_HEADERS, rows, _CONTEXT_VOLUME_ALIGNS)
 
     # --- Facet coverage buckets ---
-    facet_buckets: dict[str, list[dict]] = {
-        "0 facets": [],
-        "1-5 facets": [],
-        "6-10 facets": [],
-        "11+ facets": [],
-    }
-
-    for r in results:
-        facets = r.get("hook_unique_facets", 0)
-        if facets == 0:
-            facet_buckets["0 facets"].append(r)
-        elif facets <= 5:
-            facet_buckets["1-5 facets"].append(r)
-        elif facets <= 10:
-            facet_buckets["6-10 facets"].append(r)
-        else:
-            facet_buckets["11+ facets"].append(r)
+    facet_buckets = _group_totals(results, _facet_key)
 
     print()
     print("### Facet Coverage vs Outcomes")
     print()
     print("Unique facets surfaced by hooks during the run")
     print()
-    headers = ["Facet Coverage", "Runs", "Pass%", "Tamper%", "Avg Tokens", "Avg Cost"]
-    aligns = ["l", "r", "r", "r", "r", "r"]
     rows = []
-    for label in facet_buckets:
-        runs = facet_buckets[label]
-        n, pass_pct, avg_tok, avg_cost, _, tamper_pct = _bucket_stats(runs)
-        if n == 0:
+    for label in _FACET_LABELS:
+        if label not in facet_buckets:
             continue
+        n, pass_pct, avg_tok, avg_cost, _, tamper_pct = _totals_stats(facet_buckets[label])
         rows.append([label, str(n), pass_pct, tamper_pct, avg_tok, avg_cost])
-    md_table(headers, rows, aligns)
+    md_table(_FACET_COVERAGE_HEADERS, rows, _FACET_COVERAGE_ALIGNS)
+
+
+_HOOK_EFFECTIVENESS_HEADERS = (
+    "Treatment", "Runs", "Pass%", "vs BL",
+    "Avg Begins", "Avg Inj", "Avg Skip", "Inj Rate",
+    "Avg Facets", "Avg Fail",
+)
+_HOOK_EFFECTIVENESS_ALIGNS = ("l", "r", "r", "r", "r", "r", "r", "r", "r", "r")
 
 
 def print_hook_effectiveness(results: list[dict]):
     """Print hook injection effectiveness for runs that have hooks."""
     # Only analyze runs with hooks
-    hooked_runs = [r for r in results if r.get("hook_begins", 0) > 0]
-    if not hooked_runs:
+    if not _report_flags(results)["any_hooks"]:
         return
+    hooked_runs = [r for r in results if r.get("hook_begins", 0) > 0]
 
     print()
     print("### Hook Injection Effectiveness")
@@ -807,33 +1087,25 @@ def print_hook_effectiveness(results: list[dict]):
     print("Runs with hooks only. Injection rate = injections / hook invocations.")
     print()
     bl_rate = _baseline_pass_rate(results)
-    headers = [
-        "Treatment", "Runs", "Pass%", "vs BL",
-        "Avg Begins", "Avg Inj", "Avg Skip", "Inj Rate",
-        "Avg Facets", "Avg Fail",
-    ]
-    aligns = ["l", "r", "r", "r", "r", "r", "r", "r", "r", "r"]
 
-    by_treatment = defaultdict(list)
-    for r in hooked_runs:
-        by_treatment[r["treatment"]].append(r)
+    totals = _group_totals(hooked_runs)
 
     rows = []
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        n = len(runs)
-        pass_rate = sum(1 for r in runs if r.get("acceptance_pass")) / n * 100
-        total_begins = sum(r.get("hook_begins", 0) for r in runs)
-        total_inj = sum(r.get("hook_injections", 0) for r in runs)
-        total_skip = sum(r.get("hook_skips", 0) for r in runs)
-        total_fail = sum(r.get("hook_failures", 0) for r in runs)
+    for treatment in sorted(totals):
+        t = totals[treatment]
+        n = t["n"]
+        pass_rate = t["passed"] / n * 100
+        total_begins = t["hook_begins"]
+        total_inj = t["hook_injections"]
+        total_skip = t["hook_skips"]
+        total_fail = t["hook_failures"]
         inj_rate = f"{total_inj / total_begins * 100:.0f}%" if total_begins > 0 else "-"
 
         avg_begins = total_begins / n
         avg_inj = total_inj / n
         avg_skip = total_skip / n
         avg_fail = total_fail / n
-        avg_facets = sum(r.get("hook_unique_facets", 0) for r in runs) / n
+        avg_facets = t["hook_unique_facets"] / n
 
         rows.append([
             treatment,
@@ -847,14 +1119,23 @@ def print_hook_effectiveness(results: list[dict]):
             f"{avg_facets:.1f}",
             f"{avg_fail:.1f}",
         ])
-    md_table(headers, rows, aligns)
+    md_table(_HOOK_EFFECTIVENESS_HEADERS, rows, _HOOK_EFFECTIVENESS_ALIGNS)
+
+
+_MCP_PATTERN_HEADERS = (
+    "Treatment", "Runs", "Pass%", "vs BL",
+    "bdd_test", "bdd_motiv", "bdd_locate", "bdd_status", "Total MCP",
+)
+_MCP_PATTERN_ALIGNS = ("l", "r", "r", "r", "r", "r", "r", "r", "r")
+_MCP_USAGE_HEADERS = ("MCP Tool", "Total Calls", "Runs Using", "Avg/Run", "Pass% (users)", "Pass% (non-users)")
+_MCP_USAGE_ALIGNS = ("l", "r", "r", "r", "r", "r")
 
 
 def print_mcp_tool_patterns(results: list[dict]):
     """Print MCP tool usage breakdown and correlation with outcomes."""
-    mcp_runs = [r for r in results if r.get("mcp_tool_calls", 0) > 0]
-    if not mcp_runs:
+    if not _report_flags(results)["any_mcp"]:
         return
+    mcp_runs = [r for r in results if r.get("mcp_tool_calls", 0) > 0]
 
     print()
     print("### MCP Tool Usage Patterns")
@@ -862,86 +1143,82 @@ def print_mcp_tool_patterns(results: list[dict]):
     print("Runs with MCP tool calls only.")
     print()
     bl_rate = _baseline_pass_rate(results)
-    headers = [
-        "Treatment", "Runs", "Pass%", "vs BL",
-        "bdd_test", "bdd_motiv", "bdd_locate", "bdd_status", "Total MCP",
-    ]
-    aligns = ["l", "r", "r", "r", "r", "r", "r", "r", "r"]
 
-    by_treatment = defaultdict(list)
-    for r in mcp_runs:
-        by_treatment[r["treatment"]].append(r)
+    totals = _group_totals(mcp_runs)
 
     rows = []
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        n = len(runs)
-        pass_rate = sum(1 for r in runs if r.get("acceptance_pass")) / n * 100
-        avg_test = sum(r.get("bdd_test_calls", 0) for r in runs) / n
-        avg_motiv = sum(r.get("bdd_motivation_calls", 0) for r in runs) / n
-        avg_locate = sum(r.get("bdd_locate_calls", 0) for r in runs) / n
-        avg_status = sum(r.get("bdd_status_calls", 0) for r in runs) / n
-        avg_total = sum(r.get("mcp_tool_calls", 0) for r in runs) / n
-
+    for treatment in sorted(totals):
+        t = totals[treatment]
+        n = t["n"]
+        pass_rate = t["passed"] / n * 100
         rows.append([
             treatment,
             str(n),
             f"{pass_rate:.0f}%",
             fmt_pass_delta(pass_rate, bl_rate),
-            f"{avg_test:.1f}",
-            f"{avg_motiv:.1f}",
-            f"{avg_locate:.1f}",
-            f"{avg_status:.1f}",
-            f"{avg_total:.1f}",
+            *(f"{t[field] / n:.1f}" for field in _MCP_AVG_FIELDS),
         ])
-    md_table(headers, rows, aligns)
+    md_table(_MCP_PATTERN_HEADERS, rows, _MCP_PATTERN_ALIGNS)
 
     # Also show per-tool usage across all MCP runs
     print()
     print("#### MCP Tool Usage Summary (across all MCP runs)")
     print()
-    tool_names = ["bdd_test", "bdd_motivation", "bdd_locate", "bdd_status"]
-    field_map = {
-        "bdd_test": "bdd_test_calls",
-        "bdd_motivation": "bdd_motivation_calls",
-        "bdd_locate": "bdd_locate_calls",
-        "bdd_status": "bdd_status_calls",
-    }
-    headers2 = ["MCP Tool", "Total Calls", "Runs Using", "Avg/Run", "Pass% (users)", "Pass% (non-users)"]
-    aligns2 = ["l", "r", "r", "r", "r", "r"]
+    # One pass for all tools: per tool [total calls, users, passing users];
+    # non-user figures are the remainder of the overall counts.
+    tallies = [[0, 0, 0] for _ in _MCP_TOOLS]
+    n_runs = len(results)
+    passed_runs = 0
+    for r in results:
+        passed = 1 if r.get("acceptance_pass") else 0
+        passed_runs += passed
+        for tally, (_, field) in zip(tallies, _MCP_TOOLS):
+            calls = r.get(field, 0)
+            tally[0] += calls
+            if calls > 0:
+                tally[1] += 1
+                tally[2] += passed
     rows2 = []
-    for tool in tool_names:
-        field = field_map[tool]
-        total_calls = sum(r.get(field, 0) for r in results)
-        users = [r for r in results if r.get(field, 0) > 0]
-        non_users = [r for r in results if r.get(field, 0) == 0]
-        n_users = len(users)
+    for (tool, _), (total_calls, n_users, passed_users) in zip(_MCP_TOOLS, tallies):
+        n_non = n_runs - n_users
+        passed_non = passed_runs - passed_users
         avg_per_run = total_calls / n_users if n_users > 0 else 0
-        pass_users = sum(1 for r in users if r.get("acceptance_pass")) / n_users * 100 if n_users > 0 else 0
-        pass_non = sum(1 for r in non_users if r.get("acceptance_pass")) / len(non_users) * 100 if non_users else 0
         rows2.append([
             tool,
             str(total_calls),
             str(n_users),
             f"{avg_per_run:.1f}",
-            f"{pass_users:.0f}%" if n_users > 0 else "-",
-            f"{pass_non:.0f}%" if non_users else "-",
+            f"{passed_users / n_users * 100:.0f}%" if n_users > 0 else "-",
+            f"{passed_non / n_non * 100:.0f}%" if n_non > 0 else "-",
         ])
-    md_table(headers2, rows2, aligns2)
+    md_table(_MCP_USAGE_HEADERS, rows2, _MCP_USAGE_ALIGNS)
+
+
+_HOOK_VARIANT_COMPARISON_HEADERS = ("Variant", "Runs", "Pass%", "vs BL", "Inj Rate", "Avg Facets", "Avg Tokens", "Avg Cost")
+_HOOK_VARIANT_COMPARISON_ALIGNS = ("l", "r", "r", "r", "r", "r", "r", "r")
 
 
 def print_hook_variant_comparison(results: list[dict]):
     """Compare different hook injection strategies (standard, differential, best-chain, narrative, progressive)."""
-    hooked_runs = [r for r in results if r.get("hook_begins", 0) > 0]
-    if not hooked_runs:
+    if _report_flags(results)["hook_variants"] < 2:
         return
+    hooked_runs = [r for r in results if r.get("hook_begins", 0) > 0]
 
-    by_variant: dict[str, list[dict]] = defaultdict(list)
+    # variant -> [runs, passed, begins, injections, facets, tokens, cost]
+    acc: dict[str, list] = {}
     for r in hooked_runs:
-        c = classify_run(r)
-        by_variant[c["hook_variant"]].append(r)
-
-    if len(by_variant) < 2:
+        a = acc.setdefault(_classification(r)["hook_variant"], [0, 0, 0, 0, 0, 0, 0])
+        get = r.get
+        a[0] += 1
+        if get("acceptance_pass"):
+            a[1] += 1
+        a[2] += get("hook_begins", 0)
+        a[3] += get("hook_injections", 0)
+        a[4] += get("hook_unique_facets", 0)
+        a[5] += get("tokens_total", 0)
+        a[6] += get("budget_used_usd", 0)
+
+    if len(acc) < 2:
         return
 
     print()
@@ -950,19 +1227,13 @@ def print_hook_variant_comparison(results: list[dict]):
     print("Comparing different hook context injection strategies.")
     print()
     bl_rate = _baseline_pass_rate(results)
-    headers = ["Variant", "Runs", "Pass%", "vs BL", "Inj Rate", "Avg Facets", "Avg Tokens", "Avg Cost"]
-    aligns = ["l", "r", "r", "r", "r", "r", "r", "r"]
     rows = []
-    for variant in sorted(by_variant.keys()):
-        runs = by_variant[variant]
-        n = len(runs)
-        pass_rate = sum(1 for r in runs if r.get("acceptance_pass")) / n * 100
-        total_begins = sum(r.get("hook_begins", 0) for r in runs)
-        total_inj = sum(r.get("hook_injections", 0) for r in runs)
+    for variant, (n, passed, total_begins, total_inj, facets, tokens, cost) in sorted(acc.items()):
+        pass_rate = passed / n * 100
         inj_rate = f"{total_inj / total_begins * 100:.0f}%" if total_begins > 0 else "-"
-        avg_facets = sum(r.get("hook_unique_facets", 0) for r in runs) / n
-        avg_tokens = sum(r.get("tokens_total", 0) for r in runs) / n
-        avg_cost = sum(r.get("budget_used_usd", 0) for r in runs) / n
+        avg_facets = facets / n
+        avg_tokens = tokens / n
+        avg_cost = cost / n
 
         rows.append([
             variant,
@@ -974,48 +1245,40 @@ def print_hook_variant_comparison(results: list[dict]):
             fmt_tokens(int(avg_tokens)),
             fmt_cost(avg_cost),
         ])
-    md_table(headers, rows, aligns)
+    md_table(_HOOK_VARIANT_COMPARISON_HEADERS, rows, _HOOK_VARIANT_COMPARISON_ALIGNS)
+
+
+_AGENT_OUTCOMES_HEADERS = ("Category", "Runs", "Pass%", "vs BL", "Tamper%", "Avg Tokens", "Avg Turns", "Avg Cost")
+_AGENT_OUTCOMES_ALIGNS = ("l", "r", "r", "r", "r", "r", "r", "r")
 
 
 def print_agent_outcomes(results: list[dict]):
     """Print outcomes for agent-based treatments vs non-agent treatments."""
-    agent_runs = [r for r in results if classify_run(r)["has_agents"]]
-    non_agent_runs = [r for r in results if not classify_run(r)["has_agents"]]
-
-    if not agent_runs:
+    if not _report_flags(results)["any_agents"]:
         return
+    agent_runs = [r for r in results if _classification(r)["has_agents"]]
+    by_agents = _group_totals(results, _agents_key)
 
     print()
     print("### Agent-Based Treatment Outcomes")
     print()
 
     bl_rate = _baseline_pass_rate(results)
-    headers = ["Category", "Runs", "Pass%", "vs BL", "Tamper%", "Avg Tokens", "Avg Turns", "Avg Cost"]
-    aligns = ["l", "r", "r", "r", "r", "r", "r", "r"]
     rows = []
 
     # Agent runs by treatment
-    by_treatment = defaultdict(list)
-    for r in agent_runs:
-        by_treatment[r["treatment"]].append(r)
-
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        n, pass_pct, avg_tok, avg_cost, avg_turns, tamper_pct = _bucket_stats(runs)
-        pr = sum(1 for r in runs if r.get("acceptance_pass")) / len(runs) * 100
-        rows.append([f"  {treatment}", str(n), pass_pct, fmt_pass_delta(pr, bl_rate), tamper_pct, avg_tok, avg_turns, avg_cost])
-
+    groups = [(f"  {treatment}", t) for treatment, t in sorted(_group_totals(agent_runs).items())]
     # Totals
-    n, pass_pct, avg_tok, avg_cost, avg_turns, tamper_pct = _bucket_stats(agent_runs)
-    pr = sum(1 for r in agent_runs if r.get("acceptance_pass")) / len(agent_runs) * 100
-    rows.append(["**All agents**", str(n), pass_pct, fmt_pass_delta(pr, bl_rate), tamper_pct, avg_tok, avg_turns, avg_cost])
+    groups.append(("**All agents**", by_agents[True]))
+    if False in by_agents:
+        groups.append(("**Non-agent**", by_agents[False]))
 
-    if non_agent_runs:
-        n, pass_pct, avg_tok, avg_cost, avg_turns, tamper_pct = _bucket_stats(non_agent_runs)
-        pr = sum(1 for r in non_agent_runs if r.get("acceptance_pass")) / len(non_agent_runs) * 100
-        rows.append(["**Non-agent**", str(n), pass_pct, fmt_pass_delta(pr, bl_rate), tamper_pct, avg_tok, avg_turns, avg_cost])
+    for label, t in groups:
+        n, pass_pct, avg_tok, avg_cost, avg_turns, tamper_pct = _totals_stats(t)
+        pr = t["passed"] / n * 100
+        rows.append([label, str(n), pass_pct, fmt_pass_delta(pr, bl_rate), tamper_pct, avg_tok, avg_turns, avg_cost])
 
-    md_table(headers, rows, aligns)
+    md_table(_AGENT_OUTCOMES_HEADERS, rows, _AGENT_OUTCOMES_ALIGNS)
 
 
 def print_bdd_diagnosis(results: list[dict]):
@@ -1023,20 +1286,49 @@ def print_bdd_diagnosis(results: list[dict]):
     if not results:
         return
 
+    # Sort every run into the diagnosis buckets in one pass
+    high_context_fails = []
+    high_context_passes = []
+    wasted_hooks = []           # hooks fired but nothing injected
+    mcp_available_unused = []   # BDD set up (hooks fired) but MCP never called
+    hook_failure_runs = []
+    bdd_tamper = []             # BDD context provided but tests tampered
+    # [runs, passed, cost] for runs with and without BDD engagement
+    bdd_tally = [0, 0, 0]
+    no_bdd_tally = [0, 0, 0]
+    no_mcp = HOOKS_NO_MCP_TREATMENTS
+    for r in results:
+        get = r.get
+        c = _classification(r)
+        begins = get("hook_begins", 0)
+        injections = get("hook_injections", 0)
+        mcp_calls = get("mcp_tool_calls", 0)
+        if c["context_volume"] >= 5:
+            (high_context_passes if get("acceptance_pass") else high_context_fails).append(r)
+        if begins > 0 and injections == 0:
+            wasted_hooks.append(r)
+        if mcp_calls == 0 and begins > 0 and r["treatment"] not in no_mcp:
+            mcp_available_unused.append(r)
+        if get("hook_failures", 0) > 0:
+            hook_failure_runs.append(r)
+        if (injections > 0 or mcp_calls > 0) and get("regression_tests_modified"):
+            bdd_tamper.append(r)
+        if begins > 0 or mcp_calls > 0:
+            tally = bdd_tally
+        elif not c["has_agents"]:
+            tally = no_bdd_tally
+        else:
+            continue
+        tally[0] += 1
+        if get("acceptance_pass"):
+            tally[1] += 1
+        tally[2] += get("budget_used_usd", 0)
+
     print()
     print("### BDD Diagnosis: Where Is BDD Failing?")
     print()
 
     # 1. High context but still failing
-    high_context_fails = [
-        r for r in results
-        if classify_run(r)["context_volume"] >= 5 and not r.get("acceptance_pass")
-    ]
-    high_context_passes = [
-        r for r in results
-        if classify_run(r)["context_volume"] >= 5 and r.get("acceptance_pass")
-    ]
-
     print("**High context (5+ interactions) outcomes:**")
     total_high = len(high_context_fails) + len(high_context_passes)
     if total_high > 0:
@@ -1050,10 +1342,6 @@ def print_bdd_diagnosis(results: list[dict]):
     print()
 
     # 2. Hooks fired but nothing injected
-    wasted_hooks = [
-        r for r in results
-        if r.get("hook_begins", 0) > 0 and r.get("hook_injections", 0) == 0
-    ]
     if wasted_hooks:
         print("**Hooks fired but zero injections (wasted hooks):**")
         for r in wasted_hooks:
@@ -1064,12 +1352,6 @@ def print_bdd_diagnosis(results: list[dict]):
         print()
 
     # 3. MCP tools available but never called
-    mcp_available_unused = [
-        r for r in results
-        if r.get("mcp_tool_calls", 0) == 0
-        and r.get("hook_begins", 0) > 0  # BDD treatment (has hooks = BDD is set up)
-        and r.get("treatment", "") not in HOOKS_NO_MCP_TREATMENTS
-    ]
     if mcp_available_unused:
         print("**BDD treatments where agent never called MCP tools:**")
         for r in mcp_available_unused:
@@ -1077,10 +1359,6 @@ def print_bdd_diagnosis(results: list[dict]):
         print()
 
     # 4. Hook failures (begins > ends)
-    hook_failure_runs = [
-        r for r in results
-        if r.get("hook_failures", 0) > 0
-    ]
     if hook_failure_runs:
         print("**Runs with hook failures (incomplete hooks):**")
         for r in hook_failure_runs:
@@ -1090,37 +1368,29 @@ def print_bdd_diagnosis(results: list[dict]):
         print()
 
     # 5. BDD context provided but tests tampered
-    bdd_tamper = [
-        r for r in results
-        if (r.get("hook_injections", 0) > 0 or r.get("mcp_tool_calls", 0) > 0)
-        and r.get("regression_tests_modified")
-    ]
     if bdd_tamper:
         print("**BDD context provided but agent still tampered with tests:**")
         for r in bdd_tamper:
-            c = classify_run(r)
+            c = _classification(r)
             print(f"  {r['task']} / {r['treatment']}: "
                   f"context_vol={c['context_volume']}, "
                   f"pass={fmt_bool(r.get('acceptance_pass', False))}")
         print()
 
     # 6. Cost efficiency: BDD overhead analysis
-    bdd_runs = [r for r in results
-                if r.get("hook_begins", 0) > 0 or r.get("mcp_tool_calls", 0) > 0]
-    no_bdd_runs = [r for r in results
-                   if r.get("hook_begins", 0) == 0 and r.get("mcp_tool_calls", 0) == 0
-                   and not classify_run(r)["has_agents"]]
-    if bdd_runs and no_bdd_runs:
-        bdd_avg_cost = sum(r.get("budget_used_usd", 0) for r in bdd_runs) / len(bdd_runs)
-        no_bdd_avg_cost = sum(r.get("budget_used_usd", 0) for r in no_bdd_runs) / len(no_bdd_runs)
-        bdd_pass = sum(1 for r in bdd_runs if r.get("acceptance_pass")) / len(bdd_runs) * 100
-        no_bdd_pass = sum(1 for r in no_bdd_runs if r.get("acceptance_pass")) / len(no_bdd_runs) * 100
+    n_bdd, bdd_passed, bdd_cost = bdd_tally
+    n_no_bdd, no_bdd_passed, no_bdd_cost = no_bdd_tally
+    if n_bdd and n_no_bdd:
+        bdd_avg_cost = bdd_cost / n_bdd
+        no_bdd_avg_cost = no_bdd_cost / n_no_bdd
+        bdd_pass = bdd_passed / n_bdd * 100
+        no_bdd_pass = no_bdd_passed / n_no_bdd * 100
 
         print("**BDD cost-effectiveness summary:**")
-        print(f"  BDD runs:    {len(bdd_runs)} runs, "
+        print(f"  BDD runs:    {n_bdd} runs, "
               f"{bdd_pass:.0f}% pass, "
               f"avg cost {fmt_cost(bdd_avg_cost)}")
-        print(f"  No-BDD runs: {len(no_bdd_runs)} runs, "
+        print(f"  No-BDD runs: {n_no_bdd} runs, "
               f"{no_bdd_pass:.0f}% pass, "
               f"avg cost {fmt_cost(no_bdd_avg_cost)}")
         if no_bdd_avg_cost > 0:
@@ -1131,8 +1401,18 @@ def print_bdd_diagnosis(results: list[dict]):
         print()
 
 
-def print_context_vs_pass_scatter(results: list[dict]):
-    """Print per-run context volume vs pass as a sortable list for diagnosis."""
+_CONTEXT_VS_PASS_SCATTER_HEADERS = ("Task", "Treatment", "Pass", "CtxVol", "Inj", "MCP", "Facets", "Variant", "Tokens", "Cost")
+_CONTEXT_VS_PASS_SCATTER_ALIGNS = ("l", "l", "c", "r", "r", "r", "r", "l", "r", "r")
+
+
+def print_context_vs_pass_scatter(results: list[dict], limit: int | None = None):
+    """Print per-run context volume vs pass as a sortable list for diagnosis.
+
+    With *limit*, only the top-*limit* runs by context volume are listed.
+    """
+    flags = _report_flags(results)
+    if not (flags["any_hooks"] or flags["any_mcp"]):
+        return
     bdd_runs = [r for r in results
                 if r.get("hook_begins", 0) > 0 or r.get("mcp_tool_calls", 0) > 0]
     if not bdd_runs:
@@ -1141,17 +1421,22 @@ def print_context_vs_pass_scatter(results: list[dict]):
     print()
     print("### Per-Run BDD Context Detail")
     print()
-    print("All BDD-active runs sorted by context volume (descending).")
+    if limit is None:
+        print("All BDD-active runs sorted by context volume (descending).")
+    else:
+        print(f"Top {limit} BDD-active runs by context volume (descending).")
     print()
 
-    headers = ["Task", "Treatment", "Pass", "CtxVol", "Inj", "MCP", "Facets", "Variant", "Tokens", "Cost"]
-    aligns = ["l", "l", "c", "r", "r", "r", "r", "l", "r", "r"]
-
     decorated = []
     for r in bdd_runs:
-        c = classify_run(r)
+        c = _classification(r)
         decorated.append((c["context_volume"], r, c))
-    decorated.sort(key=lambda x: -x[0])
+    if limit is None:
+        decorated.sort(key=itemgetter(0), reverse=True)
+    else:
+        # Same order as the full sort (ties keep run order), without
+        # sorting the runs that are cut.
+        decorated = heapq.nlargest(limit, decorated, key=itemgetter(0))
 
     rows = []
     for vol, r, c in decorated:
@@ -1167,41 +1452,43 @@ def print_context_vs_pass_scatter(results: list[dict]):
             fmt_tokens(r.get("tokens_total", 0)),
             fmt_cost(r.get("budget_used_usd", 0)),
         ])
-    md_table(headers, rows, aligns)
+    md_table(_CONTEXT_VS_PASS_SCATTER_HEADERS, rows, _CONTEXT_VS_PASS_SCATTER_ALIGNS)
 
 
 # ============================================================
 # TIER & MATRIX ANALYSIS TABLES
 # ============================================================
 
+_TIER_SUMMARY_HEADERS = ("Tier", "Treatments", "Runs", "Pass%", "vs BL", "Tamper%", "Avg Tokens", "Avg Turns", "Avg Cost")
+_TIER_SUMMARY_ALIGNS = ("l", "r", "r", "r", "r", "r", "r", "r", "r")
+
+
 def print_tier_summary(results: list[dict]):
     """Print outcomes aggregated by treatment tier."""
     if not results:
         return
 
-    by_tier: dict[str, list[dict]] = defaultdict(list)
-    for r in results:
-        tier = classify_run(r)["tier"]
-        by_tier[tier].append(r)
+    by_tier = _group_totals(results, _tier_key)
 
     print()
     print("### Outcomes by Treatment Tier")
     print()
     bl_rate = _baseline_pass_rate(results)
-    headers = ["Tier", "Treatments", "Runs", "Pass%", "vs BL", "Tamper%", "Avg Tokens", "Avg Turns", "Avg Cost"]
-    aligns = ["l", "r", "r", "r", "r", "r", "r", "r", "r"]
     rows = []
-    for tier_key in TIER_ORDER:
-        runs = by_tier.get(tier_key, [])
-        if not runs:
+    # Known tiers in display order, then any others (a tier named only in
+    # TREATMENT_TIERS) alphabetically, all from the same grouped totals
+    extra_tiers = sorted(by_tier.keys() - set(TIER_ORDER))
+    for tier_key in TIER_ORDER + extra_tiers:
+        t = by_tier.get(tier_key)
+        if t is None:
             continue
-        n = len(runs)
-        treatments = len(set(r["treatment"] for r in runs))
-        pass_rate = sum(1 for r in runs if r.get("acceptance_pass")) / n * 100
-        tamper_pct = sum(1 for r in runs if r.get("regression_tests_modified")) / n * 100
-        avg_tokens = sum(r.get("tokens_total", 0) for r in runs) / n
-        avg_turns = sum(r.get("api_turns", 0) for r in runs) / n
-        avg_cost = sum(r.get("budget_used_usd", 0) for r in runs) / n
+        n = t["n"]
+        treatments = t["treatments"]
+        pass_rate = t["passed"] / n * 100
+        tamper_pct = t["tampered"] / n * 100
+        avg_tokens = t["tokens_total"] / n
+        avg_turns = t["api_turns"] / n
+        avg_cost = t["budget_used_usd"] / n
 
         rows.append([
             TIER_LABELS.get(tier_key, tier_key),
@@ -1215,16 +1502,11 @@ def print_tier_summary(results: list[dict]):
             fmt_cost(avg_cost),
         ])
 
-    # Catch any tiers not in TIER_ORDER
-    for tier_key in sorted(by_tier.keys()):
-        if tier_key not in TIER_ORDER:
-            runs = by_tier[tier_key]
-            n = len(runs)
-            treatments = len(set(r["treatment"] for r in runs))
-            n_, pass_pct, avg_tok, avg_cost, avg_turns, tamper_pct = _bucket_stats(runs)
-            rows.append([tier_key, str(treatments), str(n), pass_pct, tamper_pct, avg_tok, avg_turns, avg_cost])
+    md_table(_TIER_SUMMARY_HEADERS, rows, _TIER_SUMMARY_ALIGNS)
 
-    md_table(headers, rows, aligns)
+
+_TIER_EFFICIENCY_HEADERS = ("Tier", "Successes", "Total Runs", "Success%", "Tokens/Success", "Cost/Success")
+_TIER_EFFICIENCY_ALIGNS = ("l", "r", "r", "r", "r", "r")
 
 
 def print_tier_efficiency(results: list[dict]):
@@ -1232,29 +1514,26 @@ def print_tier_efficiency(results: list[dict]):
     if not results:
         return
 
-    by_tier: dict[str, list[dict]] = defaultdict(list)
-    for r in results:
-        tier = classify_run(r)["tier"]
-        by_tier[tier].append(r)
+    by_tier = _group_totals(results, _tier_key)
+    succeeded = _columns(results)["succeeded"]
 
     print()
     print("### Efficiency by Tier (successful runs only)")
     print()
-    headers = ["Tier", "Successes", "Total Runs", "Success%", "Tokens/Success", "Cost/Success"]
-    aligns = ["l", "r", "r", "r", "r", "r"]
     rows = []
     for tier_key in TIER_ORDER:
-        runs = by_tier.get(tier_key, [])
-        if not runs:
+        if tier_key not in by_tier:
             continue
-        successes = [r for r in runs if r.get("acceptance_pass") and r.get("regression_pass")]
-        ns = len(successes)
-        nt = len(runs)
+        t = by_tier[tier_key]
+        nt = t["n"]
+        ns = t["succeeded"]
         if ns == 0:
             rows.append([TIER_LABELS.get(tier_key, tier_key), "0", str(nt), "0%", "N/A", "N/A"])
             continue
-        avg_tokens = sum(r.get("tokens_total", 0) for r in successes) / ns
-        avg_cost = sum(r.get("budget_used_usd", 0) for r in successes) / ns
+        # The tier's successful runs, as a sub-group of the same columns
+        s = _GroupTotals(t.columns, list(compress(t.rows, t.pick(succeeded))))
+        avg_tokens = s["tokens_total"] / ns
+        avg_cost = s["budget_used_usd"] / ns
         rows.append([
             TIER_LABELS.get(tier_key, tier_key),
             str(ns),
@@ -1263,7 +1542,33 @@ def print_tier_efficiency(results: list[dict]):
             fmt_tokens(int(avg_tokens)),
             fmt_cost(avg_cost),
         ])
-    md_table(headers, rows, aligns)
+    md_table(_TIER_EFFICIENCY_HEADERS, rows, _TIER_EFFICIENCY_ALIGNS)
+
+
+# Common prefixes/suffixes shortened in matrix headers, replaced in one
+# scan. "bdd-context" and "pre-prompt-context" are listed whole because
+# their shortened prefix ("b-", "pp-") must still turn "-context" into
+# "-ctx", as replacing each piece in turn would.
+_ABBREVIATIONS = {
+    "bdd-context": "b-ctx",
+    "pre-prompt-context": "pp-ctx",
+    "bdd-": "b-",
+    "whw-plus-": "whw+",
+    "pre-prompt-": "pp-",
+    "-context": "-ctx",
+}
+_ABBREVIATION_RE = re.compile("|".join(map(re.escape, _ABBREVIATIONS)))
+
+
+@lru_cache(maxsize=512)
+def _abbrev_treatment(name: str) -> str:
+    """Treatment name shortened to fit a matrix column header."""
+    if len(name) <= 12:
+        return name
+    short = _ABBREVIATION_RE.sub(lambda m: _ABBREVIATIONS[m.group()], name)
+    if len(short) <= 12:
+        return short
+    return short[:11] + "…"
 
 
 def print_task_x_treatment_matrix(results: list[dict]):
@@ -1271,105 +1576,97 @@ def print_task_x_treatment_matrix(results: list[dict]):
     if not results:
         return
 
-    # Collect unique tasks and treatments present in results
-    tasks = sorted(set(r["task"] for r in results))
-    treatments = sorted(set(r["treatment"] for r in results))
+    # Unique tasks and treatments present in results
+    totals = _group_totals(results)
+    tasks = sorted(_group_totals(results, "task"))
+    treatments = sorted(totals)
 
     if len(tasks) < 2 or len(treatments) < 2:
         return
 
-    # Build lookup: (task, treatment) -> list of pass booleans (multiple trials)
-    grid: dict[tuple[str, str], list[bool]] = defaultdict(list)
-    for r in results:
-        grid[(r["task"], r["treatment"])].append(bool(r.get("acceptance_pass")))
+    # (task, treatment) -> runs and passes over its trials
+    grid = _group_totals(results, _task_treatment_key)
 
     print()
     print("### Task × Treatment Pass Matrix")
     print()
 
-    # Abbreviate treatment names for column headers
-    def abbrev(name: str) -> str:
-        if len(name) <= 12:
-            return name
-        # Remove common prefixes/suffixes for brevity
-        short = name.replace("bdd-", "b-").replace("whw-plus-", "whw+")
-        short = short.replace("pre-prompt-", "pp-").replace("-context", "-ctx")
-        if len(short) <= 12:
-            return short
-        return short[:11] + "…"
-
-    headers = ["Task"] + [abbrev(t) for t in treatments]
+    headers = ["Task"] + [_abbrev_treatment(t) for t in treatments]
     aligns = ["l"] + ["c"] * len(treatments)
     rows = []
     for task in tasks:
         row = [task]
         for treatment in treatments:
-            passes = grid.get((task, treatment), [])
-            if not passes:
+            cell = grid.get((task, treatment))
+            if cell is None:
                 row.append("-")
-            elif len(passes) == 1:
-                row.append("Y" if passes[0] else "N")
+            elif cell["n"] == 1:
+                row.append("Y" if cell["passed"] else "N")
             else:
                 # Multiple trials: show pass count
-                p = sum(passes)
-                row.append(f"{p}/{len(passes)}")
+                row.append(f"{cell['passed']}/{cell['n']}")
         rows.append(row)
 
     # Add pass-rate footer row
     footer = ["**Pass%**"]
     for treatment in treatments:
-        t_runs = [r for r in results if r["treatment"] == treatment]
-        if t_runs:
-            pct = sum(1 for r in t_runs if r.get("acceptance_pass")) / len(t_runs) * 100
-            footer.append(f"{pct:.0f}%")
-        else:
-            footer.append("-")
+        t = totals[treatment]
+        footer.append(f"{t['passed'] / t['n'] * 100:.0f}%")
     rows.append(footer)
 
     md_table(headers, rows, aligns)
 
 
+_TASK_DIFFICULTY_HEADERS = ("Task", "Runs", "Pass%", "Tamper%", "Avg Tokens", "Avg Cost", "Best Treatment", "Worst Treatment")
+_TASK_DIFFICULTY_ALIGNS = ("l", "r", "r", "r", "r", "r", "l", "l")
+
+
 def print_task_difficulty(results: list[dict]):
     """Print task difficulty ranking based on cross-treatment pass rates."""
     if not results:
         return
 
-    by_task = defaultdict(list)
-    for r in results:
-        by_task[r["task"]].append(r)
+    totals = _group_totals(results, "task")
 
-    if len(by_task) < 2:
+    if len(totals) < 2:
         return
 
+    # Best and worst (treatment, pass rate) within each task, from the
+    # shared (task, treatment) groups. Groups come in first-seen order and
+    # only a strictly better rate replaces, so ties go to the first seen.
+    task_best: dict[str, tuple[str, float]] = {}
+    task_worst: dict[str, tuple[str, float]] = {}
+    for (task, treatment), cell in _group_totals(results, _task_treatment_key).items():
+        rate = cell["passed"] / cell["n"]
+        best = task_best.get(task)
+        if best is None:
+            task_best[task] = task_worst[task] = (treatment, rate)
+        elif rate > best[1]:
+            task_best[task] = (treatment, rate)
+        elif rate < task_worst[task][1]:
+            task_worst[task] = (treatment, rate)
+
     print()
     print("### Task Difficulty Ranking")
     print()
-    headers = ["Task", "Runs", "Pass%", "Tamper%", "Avg Tokens", "Avg Cost", "Best Treatment", "Worst Treatment"]
-    aligns = ["l", "r", "r", "r", "r", "r", "l", "l"]
     rows = []
 
-    # Sort by pass rate ascending (hardest first)
-    ranked = sorted(by_task.items(), key=lambda kv: sum(1 for r in kv[1] if r.get("acceptance_pass")) / len(kv[1]))
+    # Sort by pass rate ascending (hardest first); the rate is computed
+    # once per task and reused for the row, ties keep first-seen order
+    ranked = sorted(((t["passed"] / t["n"], task, t) for task, t in totals.items()),
+                    key=itemgetter(0))
 
-    for task, runs in ranked:
-        n = len(runs)
-        pass_rate = sum(1 for r in runs if r.get("acceptance_pass")) / n * 100
-        tamper_pct = sum(1 for r in runs if r.get("regression_tests_modified")) / n * 100
-        avg_tokens = sum(r.get("tokens_total", 0) for r in runs) / n
-        avg_cost = sum(r.get("budget_used_usd", 0) for r in runs) / n
+    for rate, task, t in ranked:
+        n = t["n"]
+        pass_rate = rate * 100
+        tamper_pct = t["tampered"] / n * 100
+        avg_tokens = t["tokens_total"] / n
+        avg_cost = t["budget_used_usd"] / n
 
-        # Find best/worst treatment for this task
-        by_treatment = defaultdict(list)
-        for r in runs:
-            by_treatment[r["treatment"]].append(r)
-
-        best = max(by_treatment.items(),
-                   key=lambda kv: sum(1 for r in kv[1] if r.get("acceptance_pass")) / len(kv[1]))
-        worst = min(by_treatment.items(),
-                    key=lambda kv: sum(1 for r in kv[1] if r.get("acceptance_pass")) / len(kv[1]))
-
-        best_pct = sum(1 for r in best[1] if r.get("acceptance_pass")) / len(best[1]) * 100
-        worst_pct = sum(1 for r in worst[1] if r.get("acceptance_pass")) / len(worst[1]) * 100
+        best = task_best[task]
+        worst = task_worst[task]
+        best_pct = best[1] * 100
+        worst_pct = worst[1] * 100
 
         rows.append([
             task,
@@ -1382,39 +1679,53 @@ def print_task_difficulty(results: list[dict]):
             f"{worst[0]} ({worst_pct:.0f}%)",
         ])
 
-    md_table(headers, rows, aligns)
+    md_table(_TASK_DIFFICULTY_HEADERS, rows, _TASK_DIFFICULTY_ALIGNS)
 
 
 # ============================================================
 # SEQUENCE ANALYSIS TABLES
 # ============================================================
 
+# Stand-in for a sequence run without an "aggregate" block; shared and
+# only ever read, so missing aggregates don't allocate a dict per row.
+_NO_AGGREGATE: dict = {}
+
+_SEQUENCE_TREATMENT_SUMMARY_HEADERS = ("Treatment", "Runs", "All Pass%", "vs BL", "Avg Steps", "Avg Regressions", "Avg Tokens", "Avg Time", "Avg Cost")
+_SEQUENCE_TREATMENT_SUMMARY_ALIGNS = ("l", "r", "r", "r", "r", "r", "r", "r", "r")
+
+
 def print_sequence_treatment_summary(seq_results: list[dict]):
     """Print sequence results aggregated by treatment (mirrors Summary by Treatment)."""
     if not seq_results:
         return
 
-    by_treatment = defaultdict(list)
+    # treatment -> [runs, all-pass, steps, regressions, tokens, time, cost]
+    acc: dict[str, list] = {}
     for r in seq_results:
-        by_treatment[r["treatment"]].append(r)
+        a = acc.setdefault(r["treatment"], [0, 0, 0, 0, 0, 0, 0])
+        get = r.get("aggregate", _NO_AGGREGATE).get
+        a[0] += 1
+        if get("all_steps_pass"):
+            a[1] += 1
+        a[2] += r.get("num_steps", 0)
+        a[3] += get("prior_step_regressions", 0)
+        a[4] += get("total_tokens", 0)
+        a[5] += get("total_wall_time_seconds", 0)
+        a[6] += get("total_budget_used_usd", 0)
 
     print()
     print("### Sequence Summary by Treatment")
     print()
-    bl_runs = [r for r in seq_results if r.get("treatment") == "baseline"]
-    bl_seq_rate = (sum(1 for r in bl_runs if r.get("aggregate", {}).get("all_steps_pass")) / len(bl_runs) * 100) if bl_runs else None
-    headers = ["Treatment", "Runs", "All Pass%", "vs BL", "Avg Steps", "Avg Regressions", "Avg Tokens", "Avg Time", "Avg Cost"]
-    aligns = ["l", "r", "r", "r", "r", "r", "r", "r", "r"]
+    bl = acc.get("baseline")
+    bl_seq_rate = bl[1] / bl[0] * 100 if bl else None
     rows = []
-    for treatment in sorted(by_treatment.keys()):
-        runs = by_treatment[treatment]
-        n = len(runs)
-        all_pass = sum(1 for r in runs if r.get("aggregate", {}).get("all_steps_pass")) / n * 100
-        avg_steps = sum(r.get("num_steps", 0) for r in runs) / n
-        avg_regr = sum(r.get("aggregate", {}).get("prior_step_regressions", 0) for r in runs) / n
-        avg_tokens = sum(r.get("aggregate", {}).get("total_tokens", 0) for r in runs) / n
-        avg_time = sum(r.get("aggregate", {}).get("total_wall_time_seconds", 0) for r in runs) / n
-        avg_cost = sum(r.get("aggregate", {}).get("total_budget_used_usd", 0) for r in runs) / n
+    for treatment, (n, passed, steps, regr, tokens, wall, cost) in sorted(acc.items()):
+        all_pass = passed / n * 100
+        avg_steps = steps / n
+        avg_regr = regr / n
+        avg_tokens = tokens / n
+        avg_time = wall / n
+        avg_cost = cost / n
 
         rows.append([
             treatment,
@@ -1427,7 +1738,16 @@ def print_sequence_treatment_summary(seq_results: list[dict]):
             f"{avg_time:.0f}s",
             fmt_cost(avg_cost),
         ])
-    md_table(headers, rows, aligns)
+    md_table(_SEQUENCE_TREATMENT_SUMMARY_HEADERS, rows, _SEQUENCE_TREATMENT_SUMMARY_ALIGNS)
+
+
+_SEQUENCE_SUMMARY_HEADERS = (
+    "Sequence", "Treatment", "Steps",
+    "All Pass", "Cumul Pass", "Passed", "Failed",
+    "Tokens", "Time", "Cost", "Regressions",
+)
+_SEQUENCE_SUMMARY_ALIGNS = ("l", "l", "r", "c", "c", "r", "r", "r", "r", "r", "r")
+_SEQUENCE_SUMMARY_ROW = "| {} | {} | {} | {} | {} | {} | {} | {} | {}s | {} | {} |"
 
 
 def print_sequence_summary(seq_results: list[dict]):
@@ -1440,29 +1760,33 @@ def print_sequence_summary(seq_results: list[dict]):
     print()
     print("### Sequence Summary")
     print()
-    headers = [
-        "Sequence", "Treatment", "Steps",
-        "All Pass", "Cumul Pass", "Passed", "Failed",
-        "Tokens", "Time", "Cost", "Regressions",
-    ]
-    aligns = ["l", "l", "r", "c", "c", "r", "r", "r", "r", "r", "r"]
-    rows = []
+    row = _SEQUENCE_SUMMARY_ROW.format
+    lines = []
     for r in seq_results:
-        agg = r.get("aggregate", {})
-        rows.append([
+        get = r.get("aggregate", _NO_AGGREGATE).get
+        lines.append(row(
             r["sequence"],
             r["treatment"],
-            str(r["num_steps"]),
-            fmt_bool(agg.get("all_steps_pass", False)),
-            fmt_bool(agg.get("cumulative_pass_at_every_step", False)),
-            str(agg.get("steps_passed", 0)),
-            str(agg.get("steps_failed", 0)),
-            fmt_tokens(agg.get("total_tokens", 0)),
-            f"{agg.get('total_wall_time_seconds', 0)}s",
-            fmt_cost(agg.get("total_budget_used_usd", 0)),
-            str(agg.get("prior_step_regressions", 0)),
-        ])
-    md_table(headers, rows, aligns)
+            r["num_steps"],
+            fmt_bool(get("all_steps_pass", False)),
+            fmt_bool(get("cumulative_pass_at_every_step", False)),
+            get("steps_passed", 0),
+            get("steps_failed", 0),
+            fmt_tokens(get("total_tokens", 0)),
+            get("total_wall_time_seconds", 0),
+            fmt_cost(get("total_budget_used_usd", 0)),
+            get("prior_step_regressions", 0),
+        ))
+    md_table_lines(_SEQUENCE_SUMMARY_HEADERS, lines, _SEQUENCE_SUMMARY_ALIGNS)
+
+
+_SEQUENCE_STEP_DETAIL_HEADERS = (
+    "Sequence", "Treatment", "Step", "Task",
+    "Accept", "Regress", "Prior OK", "Cumul",
+    "Tokens", "Time", "Cost",
+)
+_SEQUENCE_STEP_DETAIL_ALIGNS = ("l", "l", "r", "l", "c", "c", "c", "c", "r", "r", "r")
+_SEQUENCE_STEP_DETAIL_ROW = "| {} | {} | {} | {} | {} | {} | {}/{} | {} | {} | {}s | {} |"
 
 
 def print_sequence_step_detail(seq_results: list[dict]):
@@ -1473,43 +1797,124 @@ def print_sequence_step_detail(seq_results: list[dict]):
     print()
     print("### Sequence Step Detail")
     print()
-    headers = [
-        "Sequence", "Treatment", "Step", "Task",
-        "Accept", "Regress", "Prior OK", "Cumul",
-        "Tokens", "Time", "Cost",
-    ]
-    aligns = ["l", "l", "r", "l", "c", "c", "c", "c", "r", "r", "r"]
-    rows = []
+    row = _SEQUENCE_STEP_DETAIL_ROW.format
+    lines = []
     for r in seq_results:
-        for step in r.get("steps", []):
-            rows.append([
-                r["sequence"],
-                r["treatment"],
-                str(step["step"]),
+        sequence = r["sequence"]
+        treatment = r["treatment"]
+        for step in r.get("steps", ()):
+            get = step.get
+            prior_passed = get("prior_steps_passed", 0)
+            lines.append(row(
+                sequence,
+                treatment,
+                step["step"],
                 step["task"],
-                fmt_bool(step.get("acceptance_pass", False)),
-                fmt_bool(step.get("regression_pass", False)),
-                f"{step.get('prior_steps_passed', 0)}/{step.get('prior_steps_passed', 0) + step.get('prior_steps_failed', 0)}",
-                fmt_bool(step.get("cumulative_pass", False)),
-                fmt_tokens(step.get("tokens_total", 0)),
-                f"{step.get('wall_time_seconds', 0)}s",
-                fmt_cost(step.get("budget_used_usd", 0)),
-            ])
-    md_table(headers, rows, aligns)
+                fmt_bool(get("acceptance_pass", False)),
+                fmt_bool(get("regression_pass", False)),
+                prior_passed,
+                prior_passed + get("prior_steps_failed", 0),
+                fmt_bool(get("cumulative_pass", False)),
+                fmt_tokens(get("tokens_total", 0)),
+                get("wall_time_seconds", 0),
+                fmt_cost(get("budget_used_usd", 0)),
+            ))
+    md_table_lines(_SEQUENCE_STEP_DETAIL_HEADERS, lines, _SEQUENCE_STEP_DETAIL_ALIGNS)
 
 
 # ============================================================
 # HTML Report
 # ============================================================
 
+# Run fields the report's JavaScript reads; anything else in a metrics
+# file (tool breakdowns, line counts, ...) is left out of the page.
+_HTML_RESULT_FIELDS = frozenset({
+    "task", "treatment", "subject", "timestamp",
+    "acceptance_pass", "regression_pass", "regression_delta",
+    "regression_skipped", "regression_tests_modified", "stop_blocks",
+    "tokens_total", "api_turns", "wall_time_seconds", "budget_used_usd",
+    "hook_begins", "hook_injections", "hook_skips", "hook_failures",
+    "hook_unique_facets", "mcp_tool_calls", "bdd_test_calls",
+    "bdd_motivation_calls", "bdd_locate_calls", "bdd_status_calls",
+    "edit_log_entries", "tool_errors", "tool_error_types",
+    # enrich_results / enrich_quality
+    "_engagement", "_engagement_tag", "_tier", "_hook_variant",
+    "_context_volume", "_has_hooks", "_has_mcp", "_has_agents", "_has_skills",
+    "_quality_score", "_correctness", "_integrity", "_conciseness",
+    "_clean_code", "_file_precision", "_file_recall", "_unexpected_files",
+    "_antipatterns",
+})
+_HTML_SEQUENCE_FIELDS = frozenset({
+    "sequence", "treatment", "timestamp", "num_steps", "aggregate", "steps",
+})
+
+
+def _project(rows: list[dict], fields: frozenset) -> list[dict]:
+    """Copies of *rows* keeping only *fields*, in each row's own key order.
+
+    "timestamp" becomes integer Unix seconds (UTC), so the page's date
+    filter compares numbers; a missing or unparseable one is dropped,
+    which the filter treats like an empty one.
+    """
+    out = []
+    for r in rows:
+        row = {k: v for k, v in r.items() if k in fields}
+        if "timestamp" in row:
+            ts = _unix_seconds(row["timestamp"])
+            if ts is None:
+                del row["timestamp"]
+            else:
+                row["timestamp"] = ts
+        out.append(row)
+    return out
+
+
+def _column_table(rows: list[dict], fields: frozenset) -> dict:
+    """*rows* projected to *fields* and laid out column-wise.
+
+    Returns {"n": row count, "columns": {field: [value per row]},
+    "strings": {field: [distinct values]}}, the fields in first-seen
+    order; a row without a field has None there. Each key is written once
+    rather than once per row, and the page rebuilds rows that all share
+    the same fields. A column holding only strings (and None) is written
+    as indices into its "strings" list, so a treatment or task name
+    appears once instead of on every run.
+    """
+    rows = _project(rows, fields)
+    names = dict.fromkeys(k for r in rows for k in r)
+    columns, strings = {}, {}
+    for k in names:
+        col = [r.get(k) for r in rows]
+        if (any(isinstance(v, str) for v in col)
+                and all(v is None or isinstance(v, str) for v in col)):
+            codes: dict = {}
+            col = [codes.setdefault(v, len(codes)) for v in col]
+            strings[k] = list(codes)
+        columns[k] = col
+    return {"n": len(rows), "columns": columns, "strings": strings}
+
+
+def _unix_seconds(ts) -> int | None:
+    """Compact UTC timestamp ("20260203T000000Z") as Unix seconds."""
+    try:
+        return calendar.timegm(time.strptime(ts, "%Y%m%dT%H%M%SZ"))
+    except (TypeError, ValueError):
+        return None
+
+
 def generate_html_report(results: list[dict], seq_results: list[dict],
-                         output_path: Path, since: str = "", num_rate_limited: int = 0):
-    """Generate self-contained interactive HTML report."""
+                         output_path: Path, since: str = "", num_rate_limited: int = 0,
+                         compress: bool = False):
+    """Generate self-contained interactive HTML report.
+
+    With *compress*, the page is written gzip-compressed to
+    *output_path* + ".gz" instead.
+    """
     import datetime
 
     data = {
-        "results": results,
-        "sequences": seq_results,
+        "results": _column_table(results, _HTML_RESULT_FIELDS),
+        "sequences": _column_table(seq_results, _HTML_SEQUENCE_FIELDS),
         "meta": {
             "generated": datetime.datetime.now().isoformat(),
             "since": since,
@@ -1526,12 +1931,19 @@ def generate_html_report(results: list[dict], seq_results: list[dict],
         },
     }
 
-    data_json = json.dumps(data, default=str)
-
-    html = HTML_TEMPLATE.replace("/*DATA_PLACEHOLDER*/", data_json)
+    # Written around the payload rather than spliced into the template, so
+    # the page is never held as one more string the size of the data.
+    # One-shot encode rather than json.dump: only that path is in C.
+    data_json = _dumps(data)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(html)
+    opener = open
+    if compress:
+        output_path = output_path.with_name(output_path.name + ".gz")
+        opener = partial(gzip.open, compresslevel=6)
+    with opener(output_path, "wb") as f:
+        f.write(_HTML_HEAD)
+        f.write(data_json)
+        f.write(_HTML_TAIL)
     print(f"HTML report written to: {output_path}")
 
 
@@ -1630,10 +2042,31 @@ var state = {
   activeTab: 'summary',
   dirty: {},
   filtered: null,
-  filteredSeq: null
+  filteredSeq: null,
+  filterKey: null,    // filter inputs behind state.filtered
+  renderedKey: {},    // tab -> filterKey its content was rendered for
+  groups: {}          // filteredGroups() cache for state.filtered
 };
 
 // === Utilities ===
+// Rows of a payload table ({n, columns, strings}); every row is given every
+// column, in the same order, so all rows share one shape. A column listed
+// in strings holds indices into that list.
+function fromColumns(table) {
+  var names = Object.keys(table.columns);
+  var cols = names.map(function(k){return table.columns[k]});
+  var dicts = names.map(function(k){return table.strings[k]});
+  var rows = new Array(table.n);
+  for (var i = 0; i < table.n; i++) {
+    var r = {};
+    for (var j = 0; j < names.length; j++) {
+      r[names[j]] = dicts[j] ? dicts[j][cols[j][i]] : cols[j][i];
+    }
+    rows[i] = r;
+  }
+  return rows;
+}
+
 function groupBy(arr, keyFn) {
   var m = {};
   for (var i = 0; i < arr.length; i++) {
@@ -1643,6 +2076,30 @@ function groupBy(arr, keyFn) {
   }
   return m;
 }
+// Groupings of state.filtered shared by every tab, built on first use
+// and dropped on each filter pass
+var GROUPINGS = {
+  treatment: function(r){return r.treatment},
+  task: function(r){return r.task},
+  tier: function(r){return r._tier||'none'}
+};
+function filteredGroups(name) {
+  var g = state.groups[name];
+  if (!g) g = state.groups[name] = groupBy(state.filtered || [], GROUPINGS[name]);
+  return g;
+}
+// task -> treatment -> runs over state.filtered, from the task grouping
+function filteredTaskTreatments() {
+  var g = state.groups.taskTreatment;
+  if (!g) {
+    g = state.groups.taskTreatment = {};
+    var byTask = filteredGroups('task');
+    Object.keys(byTask).forEach(function(t) {
+      g[t] = groupBy(byTask[t], GROUPINGS.treatment);
+    });
+  }
+  return g;
+}
 function sortedKeys(obj) { return Object.keys(obj).sort(); }
 function sum(arr, fn) { var s = 0; for (var i = 0; i < arr.length; i++) s += fn(arr[i]); return s; }
 function count(arr, fn) { var c = 0; for (var i = 0; i < arr.length; i++) if (fn(arr[i])) c++; return c; }
@@ -1663,6 +2120,27 @@ function fmtPassDelta(rate, bl) {
 }
 function fmtFloat(v, d) { return v.toFixed(d === undefined ? 1 : d); }
 function avg(arr, fn) { return arr.length === 0 ? 0 : sum(arr, fn) / arr.length; }
+// Counts and per-run sums over runs, from one pass: n, passed, skipped,
+// tampered, and the totals of quality, blocks, tokens, turns, time, cost,
+// delta. Divide a total by n for the average avg() would give.
+function rollup(runs) {
+  var t = {n: runs.length, passed: 0, skipped: 0, tampered: 0, quality: 0, blocks: 0,
+           tokens: 0, turns: 0, time: 0, cost: 0, delta: 0};
+  for (var i = 0; i < runs.length; i++) {
+    var r = runs[i];
+    if (r.acceptance_pass) t.passed++;
+    if ((r.regression_skipped||0) > 0) t.skipped++;
+    if (r.regression_tests_modified) t.tampered++;
+    t.quality += r._quality_score||0;
+    t.blocks += r.stop_blocks||0;
+    t.tokens += r.tokens_total||0;
+    t.turns += r.api_turns||0;
+    t.time += r.wall_time_seconds||0;
+    t.cost += r.budget_used_usd||0;
+    t.delta += r.regression_delta||0;
+  }
+  return t;
+}
 function passClass(pctStr) {
   var v = parseInt(pctStr);
   if (isNaN(v)) return '';
@@ -1954,13 +2432,14 @@ function sortTable(table, colIdx, aligns) {
 function bucketStats(runs) {
   var n = runs.length;
   if (n === 0) return {n:0, passPct:'-', avgTokens:'-', avgCost:'-', avgTurns:'-', tamperPct:'-'};
+  var s = rollup(runs);
   return {
     n: n,
-    passPct: fmtPct(count(runs, function(r){return r.acceptance_pass}), n),
-    avgTokens: fmtTokens(Math.round(avg(runs, function(r){return r.tokens_total||0}))),
-    avgCost: fmtCost(avg(runs, function(r){return r.budget_used_usd||0})),
-    avgTurns: fmtFloat(avg(runs, function(r){return r.api_turns||0})),
-    tamperPct: fmtPct(count(runs, function(r){return r.regression_tests_modified}), n)
+    passPct: fmtPct(s.passed, n),
+    avgTokens: fmtTokens(Math.round(s.tokens / n)),
+    avgCost: fmtCost(s.cost / n),
+    avgTurns: fmtFloat(s.turns / n),
+    tamperPct: fmtPct(s.tampered, n)
   };
 }
 
@@ -1969,18 +2448,27 @@ function tryRegex(pattern) {
   if (!pattern) return null;
   try { return new RegExp(pattern, 'i'); } catch(e) { return false; }
 }
-// Convert datetime-local value "2026-02-03T00:00" to compact "20260203T000000Z"
-function toCompactTS(dtLocal) {
-  if (!dtLocal) return '';
-  return dtLocal.replace(/[-:]/g, '').replace(/T(\d{4})$/, 'T$100') + 'Z';
+// Convert datetime-local value "2026-02-03T00:00", read as UTC like the
+// run timestamps, to Unix seconds (0 when empty or invalid)
+function toUnixTS(dtLocal) {
+  if (!dtLocal) return 0;
+  return Math.floor(Date.parse(dtLocal + 'Z') / 1000) || 0;
 }
 
 function getFilteredResults() {
-  var sRe = tryRegex(document.getElementById('f-subject').value);
-  var tRe = tryRegex(document.getElementById('f-treatment').value);
-  var kRe = tryRegex(document.getElementById('f-task').value);
-  var startVal = toCompactTS(document.getElementById('f-start').value);
-  var endVal = toCompactTS(document.getElementById('f-end').value);
+  var inputs = ['f-subject','f-treatment','f-task','f-start','f-end'].map(function(id) {
+    return document.getElementById(id).value;
+  });
+  // Same inputs as the last pass: the filtered lists and tabs still hold
+  var key = inputs.join('\u0000');
+  if (key === state.filterKey) return;
+  state.filterKey = key;
+
+  var sRe = tryRegex(inputs[0]);
+  var tRe = tryRegex(inputs[1]);
+  var kRe = tryRegex(inputs[2]);
+  var startVal = toUnixTS(inputs[3]);
+  var endVal = toUnixTS(inputs[4]);
 
   // Mark invalid
   document.getElementById('f-subject').classList.toggle('invalid', sRe === false);
@@ -2006,6 +2494,7 @@ function getFilteredResults() {
 
   state.filtered = filtered;
   state.filteredSeq = filteredSeq;
+  state.groups = {};
 
   // Stats bar
   document.getElementById('stats-bar').textContent =
@@ -2014,9 +2503,10 @@ function getFilteredResults() {
     (DATA.meta.num_rate_limited ? ' (' + DATA.meta.num_rate_limited + ' rate-limited excluded)' : '') +
     (DATA.meta.since ? ' since ' + DATA.meta.since : '');
 
-  // Mark all tabs dirty
+  // Mark dirty the tabs last rendered for other inputs (a tab not visited
+  // since the filter was changed and changed back is still current)
   var tabs = ['summary','matrix','efficiency','bdd','context','diagnostics','detail','quality','sequences'];
-  for (var i = 0; i < tabs.length; i++) state.dirty[tabs[i]] = true;
+  for (var i = 0; i < tabs.length; i++) state.dirty[tabs[i]] = state.renderedKey[tabs[i]] !== key;
   renderActiveTab();
 }
 
@@ -2054,30 +2544,31 @@ function renderActiveTab() {
     case 'sequences': renderSequencesTab(el, seqs); break;
   }
   state.dirty[tab] = false;
+  state.renderedKey[tab] = state.filterKey;
 }
 
 // ============ TAB 1: Summary ============
 function renderSummaryTab(el, results, seqs) {
   // Summary by Treatment
   var h = document.createElement('h3'); h.textContent = 'Summary by Treatment'; el.appendChild(h);
-  var byT = groupBy(results, function(r){return r.treatment});
+  var byT = filteredGroups('treatment');
   var bl = baselinePassRate(results);
   var headers = ['Treatment','Runs','Pass%','vs BL','Avg Qual','Avg Blks','Skip%','Tamper%','Avg Tokens','Avg Turns','Avg Time','Avg Cost'];
   var aligns = ['l','r','r','r','r','r','r','r','r','r','r','r'];
   var rows = [];
   sortedKeys(byT).forEach(function(t) {
-    var runs = byT[t], n = runs.length;
-    var pr = count(runs,function(r){return r.acceptance_pass}) / n * 100;
-    rows.push([t, n, fmtPct(count(runs,function(r){return r.acceptance_pass}),n),
+    var s = rollup(byT[t]), n = s.n;
+    var pr = s.passed / n * 100;
+    rows.push([t, n, fmtPct(s.passed,n),
       fmtPassDelta(pr, bl),
-      fmtFloat(avg(runs,function(r){return r._quality_score||0})),
-      fmtFloat(avg(runs,function(r){return r.stop_blocks||0})),
-      fmtPct(count(runs,function(r){return(r.regression_skipped||0)>0}),n),
-      fmtPct(count(runs,function(r){return r.regression_tests_modified}),n),
-      fmtTokens(Math.round(avg(runs,function(r){return r.tokens_total||0}))),
-      fmtFloat(avg(runs,function(r){return r.api_turns||0})),
-      Math.round(avg(runs,function(r){return r.wall_time_seconds||0}))+'s',
-      fmtCost(avg(runs,function(r){return r.budget_used_usd||0}))]);
+      fmtFloat(s.quality / n),
+      fmtFloat(s.blocks / n),
+      fmtPct(s.skipped,n),
+      fmtPct(s.tampered,n),
+      fmtTokens(Math.round(s.tokens / n)),
+      fmtFloat(s.turns / n),
+      Math.round(s.time / n)+'s',
+      fmtCost(s.cost / n)]);
   });
   renderTable(el, headers, rows, aligns);
 
@@ -2107,64 +2598,65 @@ function renderSummaryTab(el, results, seqs) {
 
   // Summary by Task
   h = document.createElement('h3'); h.textContent = 'Summary by Task'; el.appendChild(h);
-  var byTask = groupBy(results, function(r){return r.task});
+  var byTask = filteredGroups('task');
   headers = ['Task','Runs','Pass%','Avg Qual','Avg Tokens','Avg Turns','Avg Cost'];
   aligns = ['l','r','r','r','r','r','r'];
   rows = [];
   sortedKeys(byTask).forEach(function(t) {
-    var runs = byTask[t], n = runs.length;
-    rows.push([t, n, fmtPct(count(runs,function(r){return r.acceptance_pass}),n),
-      fmtFloat(avg(runs,function(r){return r._quality_score||0})),
-      fmtTokens(Math.round(avg(runs,function(r){return r.tokens_total||0}))),
-      fmtFloat(avg(runs,function(r){return r.api_turns||0})),
-      fmtCost(avg(runs,function(r){return r.budget_used_usd||0}))]);
+    var s = rollup(byTask[t]), n = s.n;
+    rows.push([t, n, fmtPct(s.passed,n),
+      fmtFloat(s.quality / n),
+      fmtTokens(Math.round(s.tokens / n)),
+      fmtFloat(s.turns / n),
+      fmtCost(s.cost / n)]);
   });
   renderTable(el, headers, rows, aligns);
 
   // Tier Summary
   h = document.createElement('h3'); h.textContent = 'Outcomes by Treatment Tier'; el.appendChild(h);
-  var byTier = groupBy(results, function(r){return r._tier||'none'});
+  var byTier = filteredGroups('tier');
   headers = ['Tier','Treatments','Runs','Pass%','vs BL','Avg Qual','Tamper%','Avg Tokens','Avg Turns','Avg Cost'];
   aligns = ['l','r','r','r','r','r','r','r','r','r'];
   rows = [];
   DATA.constants.TIER_ORDER.forEach(function(tk) {
     var runs = byTier[tk]; if (!runs||!runs.length) return;
-    var n = runs.length, tSet = {};
+    var s = rollup(runs), n = s.n, tSet = {};
     runs.forEach(function(r){tSet[r.treatment]=1});
-    var tierPr = count(runs,function(r){return r.acceptance_pass}) / n * 100;
+    var tierPr = s.passed / n * 100;
     rows.push([DATA.constants.TIER_LABELS[tk]||tk, Object.keys(tSet).length, n,
-      fmtPct(count(runs,function(r){return r.acceptance_pass}),n),
+      fmtPct(s.passed,n),
       fmtPassDelta(tierPr, bl),
-      fmtFloat(avg(runs,function(r){return r._quality_score||0})),
-      fmtPct(count(runs,function(r){return r.regression_tests_modified}),n),
-      fmtTokens(Math.round(avg(runs,function(r){return r.tokens_total||0}))),
-      fmtFloat(avg(runs,function(r){return r.api_turns||0})),
-      fmtCost(avg(runs,function(r){return r.budget_used_usd||0}))]);
+      fmtFloat(s.quality / n),
+      fmtPct(s.tampered,n),
+      fmtTokens(Math.round(s.tokens / n)),
+      fmtFloat(s.turns / n),
+      fmtCost(s.cost / n)]);
   });
   renderTable(el, headers, rows, aligns);
 
   // Task Difficulty
   h = document.createElement('h3'); h.textContent = 'Task Difficulty Ranking'; el.appendChild(h);
+  var taskTreatments = filteredTaskTreatments();
   var tEntries = Object.keys(byTask).map(function(t) {
-    var runs = byTask[t];
-    return {task:t, runs:runs, passRate: count(runs,function(r){return r.acceptance_pass})/runs.length};
+    var s = rollup(byTask[t]);
+    return {task:t, stats:s, passRate: s.passed/s.n};
   }).sort(function(a,b){return a.passRate - b.passRate});
   headers = ['Task','Runs','Pass%','Avg Qual','Tamper%','Avg Tokens','Avg Cost','Best Treatment','Worst Treatment'];
   aligns = ['l','r','r','r','r','r','r','l','l'];
   rows = [];
   tEntries.forEach(function(e) {
-    var runs = e.runs, n = runs.length;
-    var byTr = groupBy(runs, function(r){return r.treatment});
+    var s = e.stats, n = s.n;
+    var byTr = taskTreatments[e.task];
     var trEntries = Object.keys(byTr).map(function(t){
       var rr=byTr[t]; return {name:t, pct:count(rr,function(r){return r.acceptance_pass})/rr.length};
     });
     var best = trEntries.reduce(function(a,b){return a.pct>=b.pct?a:b});
     var worst = trEntries.reduce(function(a,b){return a.pct<=b.pct?a:b});
-    rows.push([e.task, n, fmtPct(count(runs,function(r){return r.acceptance_pass}),n),
-      fmtFloat(avg(runs,function(r){return r._quality_score||0})),
-      fmtPct(count(runs,function(r){return r.regression_tests_modified}),n),
-      fmtTokens(Math.round(avg(runs,function(r){return r.tokens_total||0}))),
-      fmtCost(avg(runs,function(r){return r.budget_used_usd||0})),
+    rows.push([e.task, n, fmtPct(s.passed,n),
+      fmtFloat(s.quality / n),
+      fmtPct(s.tampered,n),
+      fmtTokens(Math.round(s.tokens / n)),
+      fmtCost(s.cost / n),
       best.name+' ('+Math.round(best.pct*100)+'%)',
       worst.name+' ('+Math.round(worst.pct*100)+'%)']);
   });
@@ -2178,31 +2670,31 @@ function renderMatrixTab(el, results) {
   results.forEach(function(r){tSet[r.task]=1;trSet[r.treatment]=1});
   tasks = Object.keys(tSet).sort(); treatments = Object.keys(trSet).sort();
   if (tasks.length < 2 || treatments.length < 2) { el.appendChild(document.createTextNode('Need 2+ tasks and treatments.')); return; }
-  var grid = {};
-  results.forEach(function(r) {
-    var k = r.task+'|||'+r.treatment;
-    if (!grid[k]) grid[k] = [];
-    grid[k].push(!!r.acceptance_pass);
-  });
+  // Cell (task i, treatment j) lives at i*nTr+j; the sets now map names to indices
+  var nTr = treatments.length;
+  tasks.forEach(function(t, i){tSet[t]=i}); treatments.forEach(function(t, j){trSet[t]=j});
+  var total = new Uint32Array(tasks.length*nTr), pass = new Uint32Array(tasks.length*nTr);
+  var trTotal = new Uint32Array(nTr), trPass = new Uint32Array(nTr);
+  for (var i = 0; i < results.length; i++) {
+    var r = results[i], j = trSet[r.treatment], k = tSet[r.task]*nTr + j;
+    total[k]++; trTotal[j]++;
+    if (r.acceptance_pass) { pass[k]++; trPass[j]++; }
+  }
   var headers = ['Task'].concat(treatments.map(function(t){return t.length<=12?t:t.replace('bdd-','b-').replace('whw-plus-','whw+').replace('pre-prompt-','pp-').replace('-context','-ctx').substring(0,12)}));
   var aligns = ['l'].concat(treatments.map(function(){return 'c'}));
   var rows = [];
-  tasks.forEach(function(task) {
+  tasks.forEach(function(task, i) {
     var row = [task];
-    treatments.forEach(function(tr) {
-      var passes = grid[task+'|||'+tr] || [];
-      if (!passes.length) row.push('-');
-      else if (passes.length === 1) row.push(passes[0] ? 'Y' : 'N');
-      else row.push(count(passes,function(p){return p})+'/'+passes.length);
-    });
+    for (var k = i*nTr; k < (i+1)*nTr; k++) {
+      if (!total[k]) row.push('-');
+      else if (total[k] === 1) row.push(pass[k] ? 'Y' : 'N');
+      else row.push(pass[k]+'/'+total[k]);
+    }
     rows.push(row);
   });
   // Footer
   var footer = ['Pass%'];
-  treatments.forEach(function(tr) {
-    var trRuns = results.filter(function(r){return r.treatment===tr});
-    footer.push(trRuns.length ? fmtPct(count(trRuns,function(r){return r.acceptance_pass}),trRuns.length) : '-');
-  });
+  for (var j = 0; j < nTr; j++) footer.push(trTotal[j] ? fmtPct(trPass[j],trTotal[j]) : '-');
   rows.push(footer);
   renderTable(el, headers, rows, aligns);
 }
@@ -2211,7 +2703,7 @@ function renderMatrixTab(el, results) {
 function renderEfficiencyTab(el, results) {
   // Efficiency (successful runs)
   var h = document.createElement('h3'); h.textContent = 'Efficiency (successful runs only)'; el.appendChild(h);
-  var byT = groupBy(results, function(r){return r.treatment});
+  var byT = filteredGroups('treatment');
   var headers = ['Treatment','Successes','Tokens/Success','Cost/Success','Turns/Success'];
   var aligns = ['l','r','r','r','r'];
   var rows = [];
@@ -2219,15 +2711,16 @@ function renderEfficiencyTab(el, results) {
     var succ = byT[t].filter(function(r){return r.acceptance_pass && r.regression_pass});
     var n = succ.length;
     if (n === 0) { rows.push([t,'0','N/A','N/A','N/A']); return; }
-    rows.push([t, n, fmtTokens(Math.round(avg(succ,function(r){return r.tokens_total||0}))),
-      fmtCost(avg(succ,function(r){return r.budget_used_usd||0})),
-      fmtFloat(avg(succ,function(r){return r.api_turns||0}))]);
+    var s = rollup(succ);
+    rows.push([t, n, fmtTokens(Math.round(s.tokens / n)),
+      fmtCost(s.cost / n),
+      fmtFloat(s.turns / n)]);
   });
   renderTable(el, headers, rows, aligns);
 
   // Tier Efficiency
   h = document.createElement('h3'); h.textContent = 'Efficiency by Tier (successful runs only)'; el.appendChild(h);
-  var byTier = groupBy(results, function(r){return r._tier||'none'});
+  var byTier = filteredGroups('tier');
   headers = ['Tier','Successes','Total Runs','Success%','Tokens/Success','Cost/Success'];
   aligns = ['l','r','r','r','r','r'];
   rows = [];
@@ -2236,25 +2729,27 @@ function renderEfficiencyTab(el, results) {
     var succ = runs.filter(function(r){return r.acceptance_pass && r.regression_pass});
     var ns = succ.length, nt = runs.length;
     if (ns === 0) { rows.push([DATA.constants.TIER_LABELS[tk]||tk,'0',nt,'0%','N/A','N/A']); return; }
+    var s = rollup(succ);
     rows.push([DATA.constants.TIER_LABELS[tk]||tk, ns, nt, fmtPct(ns,nt),
-      fmtTokens(Math.round(avg(succ,function(r){return r.tokens_total||0}))),
-      fmtCost(avg(succ,function(r){return r.budget_used_usd||0}))]);
+      fmtTokens(Math.round(s.tokens / ns)),
+      fmtCost(s.cost / ns)]);
   });
   renderTable(el, headers, rows, aligns);
 
   // Integrity
   h = document.createElement('h3'); h.textContent = 'Test Integrity'; el.appendChild(h);
-  var byT2 = groupBy(results, function(r){return r.treatment});
+  var byT2 = filteredGroups('treatment');
   headers = ['Treatment','Runs','Avg R.Delta','Skip%','Tamper%','Avg Blks'];
   aligns = ['l','r','r','r','r','r'];
   rows = [];
   sortedKeys(byT2).forEach(function(t) {
-    var runs = byT2[t], n = runs.length;
+    var s = rollup(byT2[t]), n = s.n;
+    var avgDelta = s.delta / n;
     rows.push([t, n,
-      (avg(runs,function(r){return r.regression_delta||0})>=0?'+':'')+fmtFloat(avg(runs,function(r){return r.regression_delta||0})),
-      fmtPct(count(runs,function(r){return(r.regression_skipped||0)>0}),n),
-      fmtPct(count(runs,function(r){return r.regression_tests_modified}),n),
-      fmtFloat(avg(runs,function(r){return r.stop_blocks||0}))]);
+      (avgDelta>=0?'+':'')+fmtFloat(avgDelta),
+      fmtPct(s.skipped,n),
+      fmtPct(s.tampered,n),
+      fmtFloat(s.blocks / n)]);
   });
   renderTable(el, headers, rows, aligns);
 }
@@ -2263,7 +2758,7 @@ function renderEfficiencyTab(el, results) {
 function renderBddTab(el, results) {
   // Engagement by Treatment
   var h = document.createElement('h3'); h.textContent = 'BDD Engagement by Treatment'; el.appendChild(h);
-  var byT = groupBy(results, function(r){return r.treatment});
+  var byT = filteredGroups('treatment');
   var bl = baselinePassRate(results);
   var headers = ['Treatment','Runs','Pass%','vs BL','Avg Quality','MCP Calls','bdd_test','Hooks','Injected','Failed','Uniq Facets','Edits'];
   var aligns = ['l','r','r','r','r','r','r','r','r','r','r','r'];
@@ -2502,7 +2997,7 @@ function renderBddTab(el, results) {
   el.appendChild(p);
 
   // Aggregate per-treatment stats for scatter data
-  var byTreat = groupBy(results, function(r){return r.treatment});
+  var byTreat = filteredGroups('treatment');
   var treatStats = [];
   sortedKeys(byTreat).forEach(function(t) {
     var runs = byTreat[t], n = runs.length;
@@ -2715,7 +3210,7 @@ function renderContextTab(el, results) {
 function renderDiagnosticsTab(el, results) {
   // Treatment Features
   var h = document.createElement('h3'); h.textContent = 'Treatment Feature Matrix'; el.appendChild(h);
-  var byT = groupBy(results, function(r){return r.treatment});
+  var byT = filteredGroups('treatment');
   var headers = ['Treatment','Hooks','MCP','Agents','Skills','Hook Variant','Engagement'];
   var aligns = ['l','c','c','c','c','l','l'];
   var rows = [];
@@ -3017,6 +3512,9 @@ function renderSequencesTab(el, seqs) {
 
 // === Init ===
 (function() {
+  DATA.results = fromColumns(DATA.results);
+  DATA.sequences = fromColumns(DATA.sequences);
+
   // Restore filters from localStorage
   var saved = {};
   try { saved = JSON.parse(localStorage.getItem('bdd-bench-filters') || '{}'); } catch(e) {}
@@ -3064,6 +3562,10 @@ function renderSequencesTab(el, seqs) {
 </body>
 </html>"""
 
+# HTML_TEMPLATE split once around the data payload's placeholder and
+# encoded, so the report is written as bytes next to the encoded payload
+_HTML_HEAD, _HTML_TAIL = (part.encode() for part in HTML_TEMPLATE.split("/*DATA_PLACEHOLDER*/", 1))
+
 
 # ============================================================
 # Quality Scoring
@@ -3326,7 +3828,7 @@ def export_csv(results: list[dict], output_path: Path):
     with open(output_path, "w") as f:
         f.write(",".join(fields + computed) + "\n")
         for r in results:
-            c = classify_run(r)
+            c = _classification(r)
             row = [str(r.get(field, "")) for field in fields]
             row.append(c["engagement"])
             row.append(c["hook_variant"])
@@ -3345,7 +3847,7 @@ def export_csv(results: list[dict], output_path: Path):
 
 def parse_args(argv: list[str]) -> dict:
     """Parse CLI arguments."""
-    opts = {"csv": False, "since": "", "markdown": False, "html": False}
+    opts = {"csv": False, "since": "", "markdown": False, "html": False, "top": None, "gzip": False}
     i = 0
     while i < len(argv):
         if argv[i] == "--csv":
@@ -3357,15 +3859,23 @@ def parse_args(argv: list[str]) -> dict:
         elif argv[i] == "--html":
             opts["html"] = True
             i += 1
+        elif argv[i] == "--gzip":
+            opts["gzip"] = True
+            i += 1
         elif argv[i] == "--since" and i + 1 < len(argv):
             opts["since"] = argv[i + 1]
             i += 2
+        elif argv[i] == "--top" and i + 1 < len(argv) and argv[i + 1].isdigit():
+            opts["top"] = int(argv[i + 1])
+            i += 2
         else:
-            print(f"Usage: analyze.py [--since TIMESTAMP] [--markdown] [--html] [--csv]")
+            print(f"Usage: analyze.py [--since TIMESTAMP] [--markdown] [--html] [--gzip] [--csv] [--top N]")
             print(f"  --since     Only include results at or after TIMESTAMP (e.g. 20260217T170000Z)")
             print(f"  --markdown  Print markdown tables to stdout (legacy)")
             print(f"  --html      Write interactive HTML report (default)")
+            print(f"  --gzip      Write the HTML report gzip-compressed, as report.html.gz")
             print(f"  --csv       Export results to CSV")
+            print(f"  --top       List only the N highest-context runs in the BDD context detail table (markdown)")
             sys.exit(2)
     return opts
 
@@ -3381,8 +3891,7 @@ def main():
     opts = parse_args(sys.argv[1:])
     since = opts["since"]
 
-    results, num_rate_limited = load_results(results_dir, since=since)
-    seq_results = load_sequence_results(results_dir, since=since)
+    results, seq_results, num_rate_limited = load_all_results(results_dir, since=since)
 
     if not results and not seq_results:
         print("No results found. Run some benchmarks first:")
@@ -3405,46 +3914,54 @@ def main():
     do_html = opts["html"] or not do_markdown
 
     if do_markdown:
-        if results:
-            # --- Compact summaries first ---
-            print_summary_table(results)
-            if seq_results:
-                print_sequence_treatment_summary(seq_results)
-            print_task_summary(results)
-            print_tier_summary(results)
-            print_task_x_treatment_matrix(results)
-            print_task_difficulty(results)
-
-            # --- Efficiency & integrity ---
-            print_efficiency_table(results)
-            print_tier_efficiency(results)
-            print_integrity_table(results)
-
-            # --- BDD engagement ---
-            print_engagement_table(results)
-            print_engagement_vs_outcomes(results)
-            print_hook_effectiveness(results)
-            print_hook_variant_comparison(results)
-            print_mcp_tool_patterns(results)
-            print_agent_outcomes(results)
-            print_context_volume_analysis(results)
-            print_context_vs_pass_scatter(results)
-
-            # --- Detailed / long tables ---
-            print_reliability_table(results)
-            print_treatment_features(results)
-            print_bdd_diagnosis(results)
-            print_detail_table(results)
-
-        # --- Sequence tables ---
-        if seq_results:
-            print_sequence_summary(seq_results)
-            print_sequence_step_detail(seq_results)
+        # Collect the whole markdown report and write it to stdout once,
+        # rather than one write per print() call.
+        buf = io.StringIO()
+        try:
+            with redirect_stdout(buf):
+                if results:
+                    # --- Compact summaries first ---
+                    print_summary_table(results)
+                    if seq_results:
+                        print_sequence_treatment_summary(seq_results)
+                    print_task_summary(results)
+                    print_tier_summary(results)
+                    print_task_x_treatment_matrix(results)
+                    print_task_difficulty(results)
+
+                    # --- Efficiency & integrity ---
+                    print_efficiency_table(results)
+                    print_tier_efficiency(results)
+                    print_integrity_table(results)
+
+                    # --- BDD engagement ---
+                    print_engagement_table(results)
+                    print_engagement_vs_outcomes(results)
+                    print_hook_effectiveness(results)
+                    print_hook_variant_comparison(results)
+                    print_mcp_tool_patterns(results)
+                    print_agent_outcomes(results)
+                    print_context_volume_analysis(results)
+                    print_context_vs_pass_scatter(results, limit=opts["top"])
+
+                    # --- Detailed / long tables ---
+                    print_reliability_table(results)
+                    print_treatment_features(results)
+                    print_bdd_diagnosis(results)
+                    print_detail_table(results)
+
+                # --- Sequence tables ---
+                if seq_results:
+                    print_sequence_summary(seq_results)
+                    print_sequence_step_detail(seq_results)
+        finally:
+            sys.stdout.write(buf.getvalue())
 
     if do_html:
         html_path = results_dir / "report.html"
         generate_html_report(results, seq_results, html_path,
-                             since=since, num_rate_limited=num_rate_limited)
+                             since=since, num_rate_limited=num_rate_limited,
+                             compress=opts["gzip"])
 
     # Export CSV if requested
     if opts["csv"]:
@@ -0,0 +1,372 @@
+"""Tests for bdd_server catalog helpers: lookups, persistence, and indexing.
+
+Complements test_tool_differentiation.py by checking the internal helpers
+the MCP tools are built on, using the same 3-goal fixture catalog.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import bdd_server
+
+from test_tool_differentiation import _make_catalog, _make_index
+
+
+@pytest.fixture
+def root(tmp_path):
+    with open(tmp_path / "catalog.json", "w") as f:
+        json.dump(_make_catalog(), f)
+    return str(tmp_path)
+
+
+# ---------------------------------------------------------------------------
+# TestNodeLookups
+# ---------------------------------------------------------------------------
+
+class TestNodeLookups:
+
+    def test_derived_keys_not_persisted(self, root):
+        catalog = bdd_server.load_catalog(root)
+        bdd_server.save_catalog(catalog, root)
+
+        with open(os.path.join(root, "catalog.json")) as f:
+            on_disk = json.load(f)
+        assert set(on_disk) == {"version", "nodes"}
+
+    def test_stdlib_fallback_writes_same_bytes(self, root, monkeypatch):
+        catalog = bdd_server.load_catalog(root)
+        catalog["nodes"].append({"id": "g-004", "type": "goal", "text": "Caf\u00e9 menu \u2713",
+                                 "parent": None, "priority": 4, "labels": []})
+        bdd_server.save_catalog(catalog, root)
+        with open(os.path.join(root, "catalog.json"), "rb") as f:
+            fast = f.read()
+
+        monkeypatch.setattr(bdd_server, "orjson", None)
+        bdd_server.save_catalog(bdd_server.load_catalog(root), root)
+        with open(os.path.join(root, "catalog.json"), "rb") as f:
+            assert f.read() == fast
+
+    def test_unchanged_saves_are_skipped(self, root):
+        catalog = bdd_server.load_catalog(root)
+        path = os.path.join(root, "catalog.json")
+
+        assert bdd_server.save_catalog(catalog, root) is True
+        assert bdd_server.save_catalog(catalog, root) is False
+        assert not os.path.exists(path + ".tmp")
+
+        # An external edit invalidates the remembered payload.
+        with open(path, "w") as f:
+            f.write("{}")
+        assert bdd_server.save_catalog(catalog, root) is True
+        assert bdd_server.load_catalog(root)["nodes"] == catalog["nodes"]
+
+    def test_loads_are_cached_until_the_file_changes(self, root):
+        catalog = bdd_server.load_catalog(root)
+        assert bdd_server.load_catalog(root) is catalog
+
+        with open(os.path.join(root, "catalog.json"), "w") as f:
+            json.dump({"version": 1, "nodes": []}, f)
+        assert bdd_server.load_catalog(root)["nodes"] == []
+
+    def test_add_keeps_lookups_current(self, root, monkeypatch):
+        monkeypatch.setattr(bdd_server, "PROJECT_ROOT", root)
+        bdd_server.bdd_add("facet", "Refund reverses charge", parent="e-003")
+
+        catalog = bdd_server.load_catalog(root)
+        children = [c["id"] for c in catalog["_by_parent"]["e-003"]]
+        assert children == ["f-005", "f-006", "f-011"]
+        assert catalog["_by_type"]["facet"][-1]["id"] == "f-011"
+        assert catalog["_by_type"] == bdd_server._bucket_types(catalog["nodes"])
+
+    def test_id_counters_persist_and_reconcile(self, root, monkeypatch):
+        monkeypatch.setattr(bdd_server, "PROJECT_ROOT", root)
+        bdd_server.bdd_add("goal", "Ship reports")
+        assert bdd_server.load_catalog(root)["_counters"]["g"] == 4
+
+        # A node added behind the server's back must not be reissued.
+        with open(os.path.join(root, "catalog.json")) as f:
+            raw = json.load(f)
+        raw["nodes"].append({"id": "g-009", "type": "goal", "text": "x", "parent": None})
+        with open(os.path.join(root, "catalog.json"), "w") as f:
+            json.dump(raw, f)
+
+        assert "g-010" in bdd_server.bdd_add("goal", "Ship exports")
+
+
+# ---------------------------------------------------------------------------
+# TestStatusRollup
+# ---------------------------------------------------------------------------
+
+class TestStatusRollup:
+
+    def test_bottom_up_rollup(self, root):
+        catalog = bdd_server.load_catalog(root)
+        nodes = catalog["nodes"]
+
+        statuses = bdd_server.compute_all_statuses(nodes)
+        assert set(statuses) == {n["id"] for n in nodes}
+        assert statuses["e-001"] == "failing"
+        assert statuses["e-002"] == "passing"
+        assert statuses["g-001"] == "failing"
+        assert statuses["g-002"] == "untested"
+        assert statuses["g-003"] == "passing"
+
+    def test_results_summary(self, root):
+        summary = bdd_server.summarize_results(bdd_server.load_catalog(root))
+
+        assert summary == {
+            "passing": 5, "failing": 1, "untested": 4,
+            "satisfied": 2, "total_expectations": 5, "all_satisfied": False,
+        }
+
+    def test_cycles_are_skipped(self):
+        nodes = [
+            {"id": "e-001", "type": "expectation", "text": "a", "parent": "e-002"},
+            {"id": "e-002", "type": "expectation", "text": "b", "parent": "e-001"},
+        ]
+        assert bdd_server.compute_all_statuses(nodes) == {}
+        chain = bdd_server.get_ancestor_chain(nodes, "e-001")
+        assert [n["id"] for n in chain] == ["e-002", "e-001"]
+
+    def test_tools_survive_cycles(self, tmp_path, monkeypatch):
+        nodes = [
+            {"id": "e-001", "type": "expectation", "text": "a", "parent": "e-002"},
+            {"id": "e-002", "type": "expectation", "text": "b", "parent": "e-001"},
+            {"id": "f-001", "type": "facet", "text": "c", "parent": "e-002"},
+        ]
+        with open(tmp_path / "catalog.json", "w") as f:
+            json.dump({"version": 1, "nodes": nodes}, f)
+        index = {"forward": {}, "reverse": {"f-001": {"src/a.py": [1, 2]}},
+                 "test_results": {}, "facet_status": {}}
+        os.makedirs(tmp_path / ".bdd")
+        with open(tmp_path / ".bdd" / "index.json", "w") as f:
+            json.dump(index, f)
+        monkeypatch.setattr(bdd_server, "PROJECT_ROOT", str(tmp_path))
+
+        tree = bdd_server.bdd_tree(node_id="e-001").splitlines()
+        assert [line.split()[-3] for line in tree] == ["e-001", "e-002", "f-001"]
+        assert "src/a.py" in bdd_server.bdd_locate("e-001")
+
+    def test_deep_chain_does_not_recurse(self):
+        depth = sys.getrecursionlimit() * 2
+        nodes = [{"id": "e-0", "type": "goal", "text": "g", "parent": None}]
+        for i in range(1, depth):
+            nodes.append({"id": f"e-{i}", "type": "expectation", "text": "e", "parent": f"e-{i - 1}"})
+        nodes.append({"id": "f-0", "type": "facet", "text": "f",
+                      "parent": f"e-{depth - 1}", "status": "passing"})
+
+        assert bdd_server.compute_all_statuses(nodes)["e-0"] == "passing"
+
+
+# ---------------------------------------------------------------------------
+# TestFileMatching
+# ---------------------------------------------------------------------------
+
+class TestFileMatching:
+
+    def test_exact_suffix_and_substring(self):
+        index = _make_index()
+
+        assert bdd_server.match_index_files(index, "src/auth.py") == ["src/auth.py"]
+        assert bdd_server.match_index_files(index, "invoice.py") == ["src/invoice.py"]
+        assert sorted(bdd_server.match_index_files(index, "src/")) == sorted(index["forward"])
+        assert bdd_server.match_index_files(index, "nope.py") == []
+
+    def test_persisted_suffixes_are_used(self):
+        index = _make_index()
+        index["_indexes"] = {"suffixes": {"auth.py": ["src/session.py"]}}
+
+        assert bdd_server.match_index_files(index, "auth.py") == ["src/session.py"]
+
+    def test_lines_in_range(self):
+        index = _make_index()
+        assert bdd_server.lines_in_range(index, "src/auth.py", 11, 21) == ["11", "12", "20", "21"]
+
+        index["_indexes"] = {"lines": {"src/auth.py": [10, 11, 12, 20, 21, 22]}}
+        assert bdd_server.lines_in_range(index, "src/auth.py", 13, 19) == []
+        assert bdd_server.lines_in_range(index, "src/auth.py", 22, 99) == ["22"]
+
+
+# ---------------------------------------------------------------------------
+# TestTestIdMatching
+# ---------------------------------------------------------------------------
+
+class TestTestIdMatching:
+
+    RESULTS = {
+        "tests.test_calc::test_add": "passed",
+        "other/test_misc.py::test_sub": "failed",
+    }
+
+    @pytest.mark.parametrize("facet_test,expected", [
+        ("tests.test_calc::test_add", "tests.test_calc::test_add"),
+        ("tests/test_calc.py::test_add", "tests.test_calc::test_add"),
+        ("tests/test_ops.py::TEST_SUB", "other/test_misc.py::test_sub"),
+        ("tests/test_ops.py::test_mul", None),
+    ])
+    def test_precomputed_lookups_agree(self, facet_test, expected):
+        lookups = bdd_server.build_test_id_lookups(self.RESULTS)
+
+        with_lookups = bdd_server.match_test_to_facet(self.RESULTS, facet_test, lookups)
+        without = bdd_server.match_test_to_facet(self.RESULTS, facet_test)
+        assert with_lookups == without
+        assert with_lookups[0] == expected
+
+
+# ---------------------------------------------------------------------------
+# TestIncrementalBuild
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def built_project(root):
+    config = {
+        "test_command": "true",
+        "results_format": "pytest-json",
+        "results_file": "results.json",
+        "coverage_format": "coverage-json",
+        "coverage_file": "coverage.json",
+    }
+    results = {"tests": [
+        {"nodeid": "tests/test_auth.py::test_login_valid", "outcome": "passed"},
+        {"nodeid": "tests/test_auth.py::test_login_invalid", "outcome": "failed"},
+    ]}
+    coverage = {"files": {"src/auth.py": {"contexts": {
+        "tests/test_auth.py::test_login_valid|run": [10, 11],
+    }}}}
+    for name, data in (("bdd.json", config), ("results.json", results),
+                       ("coverage.json", coverage)):
+        with open(os.path.join(root, name), "w") as f:
+            json.dump(data, f)
+    return root
+
+
+class TestIncrementalBuild:
+
+    def test_unchanged_inputs_skip_parsing(self, built_project, monkeypatch):
+        index, _, _ = bdd_server.build_index(built_project)
+        assert "results.json" in index["manifest"]
+
+        def fail(*args):
+            raise AssertionError("inputs were re-parsed")
+        monkeypatch.setitem(bdd_server.RESULT_PARSERS, "pytest-json", fail)
+
+        again, updated, _ = bdd_server.build_index(built_project)
+        assert updated == []
+        assert again["forward"] == index["forward"]
+
+    def test_changed_inputs_rebuild(self, built_project):
+        bdd_server.build_index(built_project)
+        with open(os.path.join(built_project, "results.json"), "w") as f:
+            json.dump({"tests": [
+                {"nodeid": "tests/test_auth.py::test_login_valid", "outcome": "failed"},
+            ]}, f)
+
+        _, updated, _ = bdd_server.build_index(built_project)
+        assert {"id": "f-001", "old": "passing", "new": "failing"} in updated
+
+    @pytest.mark.parametrize("threshold", [1, 1000])
+    def test_lcov_dir_serial_and_pooled_agree(self, built_project, monkeypatch, threshold):
+        monkeypatch.setattr(bdd_server, "LCOV_POOL_THRESHOLD", threshold)
+        with open(os.path.join(built_project, "bdd.json"), "w") as f:
+            json.dump({
+                "test_command": "true",
+                "results_format": "pytest-json",
+                "results_file": "results.json",
+                "coverage_format": "lcov-dir",
+                "coverage_file": "lcov",
+            }, f)
+        lcov_dir = os.path.join(built_project, "lcov")
+        os.mkdir(lcov_dir)
+        for name, lines in (("test_login_valid", (10, 11)), ("test_login_invalid", (11, 12))):
+            with open(os.path.join(lcov_dir, f"tests__test_auth.py::{name}.lcov"), "w") as f:
+                f.write("SF:src/auth.py\n")
+                f.writelines(f"DA:{ln},1\n" for ln in lines)
+                f.write("end_of_record\n")
+
+        index, _, _ = bdd_server.build_index(built_project)
+        assert index["forward"] == {"src/auth.py": {
+            "10": ["f-001"], "11": ["f-001", "f-002"], "12": ["f-002"],
+        }}
+
+    def test_lcov_dir_matches_normalized_test_names(self, built_project):
+        with open(os.path.join(built_project, "bdd.json"), "w") as f:
+            json.dump({
+                "test_command": "true",
+                "results_format": "pytest-json",
+                "results_file": "results.json",
+                "coverage_format": "lcov-dir",
+                "coverage_file": "lcov",
+            }, f)
+        lcov_dir = os.path.join(built_project, "lcov")
+        os.mkdir(lcov_dir)
+        # Dotted module path instead of the facet's file path; "test_login"
+        # is only a substring of a facet's test and must not match.
+        for name in ("tests.test_auth::test_login_valid", "tests.test_auth::test_login"):
+            with open(os.path.join(lcov_dir, f"{name}.lcov"), "w") as f:
+                f.write("SF:src/auth.py\nDA:10,1\nend_of_record\n")
+
+        index, _, _ = bdd_server.build_index(built_project)
+        assert index["forward"] == {"src/auth.py": {"10": ["f-001"]}}
+
+
+# ---------------------------------------------------------------------------
+# TestResultParsers
+# ---------------------------------------------------------------------------
+
+class TestResultParsers:
+
+    def test_cargo_json_skips_non_test_lines(self, tmp_path):
+        path = tmp_path / "cargo.json"
+        path.write_text(
+            '{ "type": "suite", "event": "started", "test_count": 3 }\n'
+            '{ "type": "test", "event": "ok", "name": "calc::add" }\n'
+            "running 3 tests\n"
+            '{ "type": "test", "event": "failed", "name": "calc::sub" }\n'
+            '{ "type": "test", "event": "ignored", "name": "calc::mul" }\n'
+            '{ "type": "test", "event": "started", "name": "calc::div" }\n'
+            "{ truncated\n"
+        )
+
+        assert bdd_server.parse_cargo_json(str(path)) == {
+            "calc::add": "passed", "calc::sub": "failed", "calc::mul": "skipped",
+        }
+
+    def test_junit_streams_nested_suites(self, tmp_path):
+        path = tmp_path / "junit.xml"
+        path.write_text(
+            "<testsuites><testsuite name='outer'>"
+            "<testcase classname='tests.test_calc' name='test_add'/>"
+            "<testsuite name='inner'>"
+            "<testcase classname='tests.test_calc' name='test_sub'><failure/></testcase>"
+            "<testcase name='test_mul'><skipped/></testcase>"
+            "</testsuite></testsuite></testsuites>"
+        )
+
+        assert bdd_server.parse_junit(str(path)) == {
+            "tests.test_calc::test_add": "passed",
+            "tests.test_calc::test_sub": "failed",
+            "test_mul": "skipped",
+        }
+
+
+# ---------------------------------------------------------------------------
+# TestHealthChecks
+# ---------------------------------------------------------------------------
+
+class TestHealthChecks:
+
+    def test_each_cycle_reported_once(self):
+        nodes = [
+            {"id": "e-001", "type": "expectation", "text": "a", "parent": "e-002"},
+            {"id": "e-002", "type": "expectation", "text": "b", "parent": "e-001"},
+            {"id": "f-001", "type": "facet", "text": "c", "parent": "e-001"},
+        ]
+        catalog = bdd_server.reindex_catalog({"version": 1, "nodes": nodes})
+        report = bdd_server.run_checks(catalog, {}, "structural")
+
+        assert report.count("Cycle:") == 1
+        assert "e-001 -> e-002 -> e-001" in report
@@ -212,10 +212,10 @@ nodes.append({'id': 'f-001', 'type': 'facet', 'text': 'Test facet 1', 'parent':
 nodes.append({'id': 'f-002', 'type': 'facet', 'text': 'Test facet 2', 'parent': 'e-001', 'test': 'tests/test_calc.py::test_sub', 'status': 'untested'})
 save_catalog(cat, root)
 
-# Test get_node, get_children, compute_status
+# Test get_node, get_children, compute_all_statuses
 assert get_node(nodes, 'g-001') is not None
 assert len(get_children(nodes, 'e-001')) == 2
-assert compute_status(nodes, get_node(nodes, 'e-001')) == 'untested'
+assert compute_all_statuses(nodes)['e-001'] == 'untested'
 
 # Test ancestor chain
 chain = get_ancestor_chain(nodes, 'f-001')
@@ -227,7 +227,7 @@ assert chain[2]['id'] == 'f-001'
 nodes[2]['status'] = 'passing'
 nodes[3]['status'] = 'passing'
 save_catalog(cat, root)
-assert compute_status(nodes, get_node(nodes, 'e-001')) == 'passing'
+assert compute_all_statuses(nodes)['e-001'] == 'passing'
 
 # Test index operations
 idx = load_index(root)
@@ -321,7 +321,7 @@ from bdd_server import *
 root = '$MCP_TEST_DIR'
 result = build_index(root)
 assert result is not None, 'build_index returned None'
-index, updated = result
+index, updated, cat = result
 
 # Verify test results parsed
 assert len(index['test_results']) == 2, f'Expected 2 test results, got {len(index[\"test_results\"])}'